@@ -1,5 +1,9 @@
 from .q_learning.q_agent import QAgent
 from .q_learning.q_table import QTable
+from .q_learning.dense_q_table import DenseQTable
+from .q_learning.mapped_q_table import MappedQTable
+from .q_learning.frozen_q_table import FrozenQTable
+from .q_learning.policy_table import PolicyTable
 from .q_learning.training_manager import TrainManager
 
-__all__ = ['QAgent', 'QTable', 'TrainManager']
+__all__ = ['QAgent', 'QTable', 'DenseQTable', 'MappedQTable', 'FrozenQTable', 'PolicyTable', 'TrainManager']
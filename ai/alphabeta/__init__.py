@@ -0,0 +1,4 @@
+from .alphabeta_agent import AlphaBetaAgent
+from .trans_table import TransTable
+
+__all__ = ['AlphaBetaAgent', 'TransTable']
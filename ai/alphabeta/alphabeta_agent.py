@@ -0,0 +1,245 @@
+import time
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from core.board import Board
+from core.lines import get_lines
+from ai.alphabeta.trans_table import TransTable, EXACT, LOWER, UPPER
+
+WIN = 1000000        # оценка победы (минус число полуходов до нее)
+WIN_BOUND = WIN - 10000
+
+
+class _Timeout(Exception):
+    # время на ход вышло
+    pass
+
+
+class AlphaBetaAgent:
+    def __init__(self, size: int, win_len: int, sym: str,
+                 time_limit: float = 1.0, max_depth: Optional[int] = None,
+                 tt_bits: int = 18, radius: Optional[int] = None):
+        self.size = size
+        self.win_len = win_len
+        self.sym = sym
+        self.time_limit = time_limit  # секунд на ход
+        self.max_depth = max_depth    # None - до заполнения доски
+        # radius - ходы только рядом с камнями (None - все пустые клетки)
+        self.radius = radius
+        self.tt = TransTable(tt_bits)
+        self.lines = get_lines(size, win_len)
+        n = size * size
+        # веса окон по числу своих камней (окна без чужих)
+        self.weights = np.array([0] + [10 ** k for k in range(win_len)], dtype=np.int64)
+        # соседи клетки (8 направлений), n - фиктивная пустая клетка
+        neigh = np.full((n, 8), n, dtype=np.intp)
+        for idx in range(n):
+            r, c = divmod(idx, size)
+            k = 0
+            for dr in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if (dr or dc) and 0 <= r + dr < size and 0 <= c + dc < size:
+                        neigh[idx, k] = (r + dr) * size + c + dc
+                        k += 1
+        self.neigh = neigh
+        # близость к центру - последний ключ сортировки ходов
+        center = (size - 1) / 2
+        self.center = np.array([-(abs(i // size - center) + abs(i % size - center))
+                                for i in range(n)])
+        self.killers: List[List[int]] = []
+        self.history = np.zeros((3, n), dtype=np.int64)
+        self.nodes = 0
+        self.deadline = 0.0
+        self.root_move = -1
+
+    def _evaluate(self, board: Board, val: int) -> int:
+        # оценка для ходящего: окна только со своими камнями минус чужие
+        threats = board.threats
+        if threats is not None:
+            # те же суммы по счетчикам индекса угроз - без обхода окон
+            score = 0
+            for k in range(1, self.win_len + 1):
+                score += int(self.weights[k]) * (threats.count(val, k) - threats.count(3 - val, k))
+            return score
+        vals = board.grid.ravel()[self.lines.windows]
+        mine = (vals == val).sum(axis=1)
+        theirs = (vals == 3 - val).sum(axis=1)
+        score = self.weights[mine[theirs == 0]].sum() - self.weights[theirs[mine == 0]].sum()
+        return int(score)
+
+    def _order(self, board: Board, val: int, ply: int, tt_move: int) -> List[int]:
+        # порядок ходов: ход из таблицы, киллеры, история, соседи камней, центр
+        flat = board.grid.ravel()
+        if board.threats is not None:
+            # своя победа - один ход; угроза соперника - только блоки
+            wins = board.threats.wins(val)
+            if wins:
+                return wins[:1]
+            blocks = board.threats.blocks(val)
+            if blocks:
+                return sorted(blocks)
+        if board.cand is not None:
+            empty = np.array(board.cand.moves(), dtype=np.intp)
+        else:
+            empty = np.flatnonzero(flat == 0)
+        occ = np.append(flat != 0, False)
+        near = occ[self.neigh[empty]].sum(axis=1)
+        keys = self.history[val][empty] * 16 + near * 4 + self.center[empty]
+        moves = empty[np.argsort(-keys, kind='stable')].tolist()
+        front = [tt_move] + self.killers[ply] if ply < len(self.killers) else [tt_move]
+        for m in reversed(front):
+            # с radius ход из таблицы или киллер может быть вне кандидатов
+            if m >= 0 and flat[m] == 0 and m in moves:
+                moves.remove(m)
+                moves.insert(0, m)
+        return moves
+
+    def _negamax(self, board: Board, depth: int, alpha: int, beta: int,
+                 val: int, ply: int) -> int:
+        # оценка позиции для ходящего val
+        if board.winner is not None:
+            return -(WIN - ply)
+        if board.is_full():
+            return 0
+        if depth == 0:
+            return self._evaluate(board, val)
+
+        # узел на больших досках дорогой - время проверяется в каждом
+        self.nodes += 1
+        if time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+        sym = 'X' if val == 1 else 'O'
+        key = board.zobrist_key(sym)
+        orig_alpha = alpha
+        tt_move = -1
+        entry = self.tt.get(key)
+        if entry is not None:
+            tt_move = entry[4]
+            # в корне нужен сам ход, поэтому без отсечения по таблице
+            if entry[1] >= depth and ply > 0:
+                score = self._from_tt(entry[2], ply)
+                if entry[3] == EXACT:
+                    return score
+                if entry[3] == LOWER:
+                    alpha = max(alpha, score)
+                elif entry[3] == UPPER:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        best, best_move = -WIN - 1, -1
+        for m in self._order(board, val, ply, tt_move):
+            board.move(m // self.size, m % self.size, sym)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, 3 - val, ply + 1)
+            board.undo()
+            if score > best:
+                best, best_move = score, m
+            if best > alpha:
+                alpha = best
+            if alpha >= beta:
+                # ход-отсечение: в киллеры и историю
+                killers = self.killers[ply]
+                if m not in killers:
+                    killers.insert(0, m)
+                    del killers[2:]
+                self.history[val][m] += depth * depth
+                break
+
+        if best <= orig_alpha:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.put(key, depth, self._to_tt(best, ply), flag, best_move)
+        if ply == 0:
+            self.root_move = best_move
+        return best
+
+    @staticmethod
+    def _to_tt(score: int, ply: int) -> int:
+        # победа хранится от текущей позиции, а не от корня
+        if score > WIN_BOUND:
+            return score + ply
+        if score < -WIN_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _from_tt(score: int, ply: int) -> int:
+        if score > WIN_BOUND:
+            return score - ply
+        if score < -WIN_BOUND:
+            return score + ply
+        return score
+
+    def _copy_board(self, board: Board) -> Board:
+        # своя доска для поиска (ходы и undo не трогают доску игры)
+        copy = Board(self.size, self.win_len)
+        for idx in np.flatnonzero(board.grid):
+            r, c = divmod(int(idx), self.size)
+            copy.move(r, c, 'X' if board.grid[r, c] == 1 else 'O')
+        return copy
+
+    def search(self, board: Board, cur_sym: str) -> Tuple[int, int, int]:
+        # итеративное углубление: (ход, оценка, глубина последней итерации)
+        board = self._copy_board(board)
+        if self.radius:
+            board.track_candidates(self.radius)
+        board.track_threats()
+        val = 1 if cur_sym == 'X' else 2
+        empties = self.size * self.size - board.cnt
+        max_depth = min(self.max_depth or empties, empties)
+        self.tt.new_search()
+        self.killers = [[] for _ in range(max_depth + 1)]
+        self.history //= 8
+        self.nodes = 0
+        deadline = time.perf_counter() + self.time_limit
+
+        start = board.cnt
+        best_move, best_score, done = -1, 0, 0
+        for depth in range(1, max_depth + 1):
+            # первая итерация всегда до конца - ход есть при любом лимите
+            self.deadline = deadline if depth > 1 else float('inf')
+            try:
+                score = self._negamax(board, depth, -WIN - 1, WIN + 1, val, 0)
+            except _Timeout:
+                # снять ходы прерванной итерации
+                while board.cnt > start:
+                    board.undo()
+                break
+            best_move, best_score, done = self.root_move, score, depth
+            # найденная победа или поражение не изменятся с глубиной
+            if abs(score) > WIN_BOUND:
+                break
+        return best_move, best_score, done
+
+    def get_move(self, board: Board, cur_sym: str) -> Dict:
+        # получить ход через alpha-beta
+        if board.winner is not None or board.get_winner() or board.is_full():
+            return {'action': None, 'row': -1, 'col': -1, 'r': -1, 'c': -1, 'conf': 0.0}
+
+        move, score, depth = self.search(board, cur_sym)
+        r, c = divmod(move, self.size)
+        if score > WIN_BOUND:
+            conf = 1.0
+        elif score < -WIN_BOUND:
+            conf = 0.0
+        else:
+            conf = float(1 / (1 + np.exp(-score / 1000)))
+
+        return {
+            'action': (r, c),
+            'row': r,
+            'col': c,
+            'r': r,
+            'c': c,
+            'conf': conf,
+            'score': score,
+            'depth': depth
+        }
+
+    def reset(self) -> None:
+        # забыть таблицу и историю
+        self.tt.clear()
+        self.history[:] = 0
@@ -0,0 +1,43 @@
+from typing import List, Optional, Tuple
+
+# тип оценки в записи
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# запись: (ключ, глубина, оценка, тип, ход, номер поиска)
+Entry = Tuple[int, int, int, int, int, int]
+
+
+class TransTable:
+    def __init__(self, bits: int = 18):
+        # таблица фиксированного размера, слот - младшие биты ключа
+        self.size = 1 << bits
+        self.mask = self.size - 1
+        self.slots: List[Optional[Entry]] = [None] * self.size
+        self.gen = 0  # номер поиска (старение записей)
+
+    def new_search(self) -> None:
+        # записи прошлых поисков становятся кандидатами на замену
+        self.gen += 1
+
+    def get(self, key: int) -> Optional[Entry]:
+        # запись позиции (или None)
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key: int, depth: int, score: int, flag: int, move: int) -> None:
+        # замена: пустой слот, та же позиция, запись старого поиска
+        # или не меньшая глубина
+        idx = key & self.mask
+        old = self.slots[idx]
+        if (old is None or old[0] == key or old[5] != self.gen
+                or depth >= old[1]):
+            self.slots[idx] = (key, depth, score, flag, move, self.gen)
+
+    def clear(self) -> None:
+        # очистить таблицу
+        self.slots = [None] * self.size
+
+    def __len__(self) -> int:
+        return self.size - self.slots.count(None)
@@ -1,4 +1,5 @@
 from .mcts_agent import MCTSAgent
+from .array_tree import ArrayTree
 from .tree_node import MCTSNode
 
-__all__ = ['MCTSAgent', 'MCTSNode']
+__all__ = ['MCTSAgent', 'ArrayTree', 'MCTSNode']
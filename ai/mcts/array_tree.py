@@ -0,0 +1,103 @@
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+class ArrayTree:
+    def __init__(self, capacity: int = 1024):
+        # дерево MCTS в массивах по номеру узла; дети узла - подряд
+        # с first[node], count[node] штук; move - ход, ведущий в узел;
+        # узлы одной позиции (перестановки ходов) делят блок детей
+        self.visits = np.zeros(capacity, dtype=np.int32)
+        self.wins = np.zeros(capacity, dtype=np.float64)  # победы сделавшего ход
+        self.first = np.full(capacity, -1, dtype=np.int32)  # -1 - не раскрыт
+        self.count = np.zeros(capacity, dtype=np.int16)
+        self.move = np.full(capacity, -1, dtype=np.int16)
+        self.size = 0
+        self.nodes: Dict[int, int] = {}  # ключ позиции -> раскрытый узел
+
+    def _reserve(self, extra: int) -> None:
+        # расширить массивы (удвоением) под extra новых узлов
+        need = self.size + extra
+        cap = len(self.visits)
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        for name, fill in (('visits', 0), ('wins', 0), ('first', -1),
+                           ('count', 0), ('move', -1)):
+            old = getattr(self, name)
+            arr = np.full(cap, fill, dtype=old.dtype)
+            arr[:len(old)] = old
+            setattr(self, name, arr)
+
+    def root(self, key: int) -> int:
+        # узел позиции key (новый, если ее еще не раскрывали)
+        node = self.nodes.get(key)
+        if node is None:
+            self._reserve(1)
+            node = self.size
+            self.size += 1
+        return node
+
+    def share(self, node: int, key: int) -> bool:
+        # позиция key уже раскрыта в другом узле - взять его детей
+        other = self.nodes.get(key)
+        if other is None:
+            return False
+        self.first[node] = self.first[other]
+        self.count[node] = self.count[other]
+        return True
+
+    def expand(self, node: int, moves: np.ndarray, key: Optional[int] = None) -> None:
+        # добавить детей узла - по одному на ход; key - запомнить позицию
+        n = len(moves)
+        self._reserve(n)
+        start = self.size
+        self.move[start:start + n] = moves
+        self.first[node] = start
+        self.count[node] = n
+        self.size += n
+        if key is not None:
+            self.nodes[key] = node
+
+    def children(self, node: int) -> range:
+        # номера детей узла
+        start = int(self.first[node])
+        return range(start, start + int(self.count[node])) if start >= 0 else range(0)
+
+    def moves(self, node: int) -> np.ndarray:
+        # ходы детей узла
+        start = int(self.first[node])
+        if start < 0:
+            return self.move[:0]
+        return self.move[start:start + int(self.count[node])]
+
+    def backup(self, path: List[int], won: List[List[int]],
+               shares: Tuple[float, float]) -> None:
+        # обратное распространение: узлы пути без повторов (камни только
+        # добавляются - позиция в пути не повторяется); узлам ходов
+        # игрока 1 / 2 (won[0] / won[1]) - его доля побед в симуляции
+        self.visits[path] += 1
+        for nodes, share in zip(won, shares):
+            if nodes and share:
+                self.wins[nodes] += share
+
+    def clear(self) -> None:
+        # сбросить дерево (массивы остаются выделенными)
+        n = self.size
+        self.visits[:n] = 0
+        self.wins[:n] = 0
+        self.first[:n] = -1
+        self.count[:n] = 0
+        self.move[:n] = -1
+        self.size = 0
+        self.nodes.clear()
+
+    def nbytes(self) -> int:
+        # байт на занятые узлы
+        per_node = sum(a.itemsize for a in (self.visits, self.wins, self.first,
+                                            self.count, self.move))
+        return self.size * per_node
+
+    def __len__(self) -> int:
+        return self.size
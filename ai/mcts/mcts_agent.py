@@ -1,261 +1,352 @@
 import numpy as np
 import random
 import math
-from typing import List, Tuple, Dict, Optional
+import os
+import atexit
+import multiprocessing
+from multiprocessing.pool import Pool
+from typing import Tuple, Dict, Optional
 from core.board import Board
+from core.candidates import Candidates
+from core.lines import get_lines, get_rays
+from core.zobrist import get_zobrist
+from core.symmetry import get_symmetry
+from ai.mcts.array_tree import ArrayTree
+
+# пулы процессов по числу воркеров - живут между ходами
+_pools: Dict[int, Pool] = {}
+
+
+def get_pool(workers: int) -> Pool:
+    # пул на workers процессов (создается один раз)
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = multiprocessing.Pool(workers)
+        _pools[workers] = pool
+    return pool
+
+
+@atexit.register
+def close_pools() -> None:
+    # остановить все пулы
+    for pool in _pools.values():
+        pool.terminate()
+        pool.join()
+    _pools.clear()
+
+
+def _root_search(args: Tuple) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # независимый поиск в процессе пула: статистика детей корня
+    params, board_arr, sims, seed = args
+    agent = MCTSAgent(**params, sims=sims, seed=seed, workers=1)
+    return agent._search(board_arr)
+
 
 class MCTSAgent:
     def __init__(self, size: int, win_len: int, sym: str,
-                 sims: int = 1000, exp_weight: float = 1.41):
+                 sims: int = 1000, exp_weight: float = 1.41,
+                 symmetric: bool = False, radius: Optional[int] = None,
+                 seed: Optional[int] = None, batch: int = 1,
+                 workers: Optional[int] = None):
         self.size = size
         self.win_len = win_len
         self.sym = sym
         self.sims = sims
         self.exp_weight = exp_weight
-        self.tree = {}
-    
-    def _board_to_state(self, board: Board, cur_sym: str) -> str:
-        # конвертировать доску в строку
-        state = []
-        for r in range(self.size):
-            for c in range(self.size):
-                cell = board.get_cell(r, c)
-                if cell == cur_sym:
-                    state.append('1')
-                elif cell == ' ':
-                    state.append('0')
-                else:
-                    state.append('2')
-        return ''.join(state)
-    
-    def _board_arr_to_str(self, board_arr: np.ndarray) -> str:
-        # массив в строку
-        return ''.join(str(board_arr[r, c]) for r in range(self.size) for c in range(self.size))
+        self.tree = ArrayTree()  # узлы в массивах numpy
+        self.zobrist = get_zobrist(size)  # ключи позиций - хеши Зобриста
+        self.lines = get_lines(size, win_len)  # окна для проверки победы
+        self.rays = get_rays(size, win_len)  # лучи от клетки для симуляций
+        # symmetric=True - узел один на 8 поворотов/отражений позиции,
+        # ходы узла хранятся в координатах канонической доски его позиции
+        self.symmetric = symmetric
+        self.sym_table = get_symmetry(size)
+        # radius - ходы только рядом с камнями (None - все пустые клетки)
+        self.radius = radius
+        self.cand: Optional[Candidates] = None  # кандидаты текущего поиска
+        # seed - повторяемый поиск: выбор среди равных UCT и симуляции
+        self.random = random.Random(seed) if seed is not None else random
+        self.rng = np.random.default_rng(seed if seed is not None else random.getrandbits(32))
+        # batch > 1 - столько симуляций из каждого листа за один проход numpy
+        self.batch = batch
+        # workers > 1 - поиски с разными seed в пуле процессов, статистика
+        # корня складывается (по умолчанию из MCTS_WORKERS)
+        if workers is None:
+            workers = int(os.environ.get('MCTS_WORKERS', '1'))
+        self.workers = max(1, workers)
     
-    def _state_to_board(self, state: str) -> np.ndarray:
-        # строка в массив
-        arr = np.zeros((self.size, self.size), dtype=int)
-        for idx, char in enumerate(state):
-            r = idx // self.size
-            c = idx % self.size
-            arr[r, c] = int(char)
-        return arr
+    def _board_to_arr(self, board: Board, cur_sym: str) -> np.ndarray:
+        # доска в массив: 1 - текущий игрок, 2 - соперник
+        cur_val = 1 if cur_sym == 'X' else 2
+        grid = board.grid
+        return np.where(grid == 0, 0, np.where(grid == cur_val, 1, 2))
     
-    def _check_win(self, board_arr: np.ndarray, r: int, c: int, val: int) -> bool:
-        # проверить победу
-        if val == 0:
-            return False
+    def _simulate_random(self, board_arr: np.ndarray, cur_player: int) -> int:
+        # случайная симуляция на копии доски в списке; пустые клетки
+        # перемешиваются один раз, победа - только по лучам через ход
+        # (на доске перед симуляцией собранных окон нет)
+        cells = board_arr.ravel().tolist()
+        rays = self.rays
+        need = self.win_len - 1
+        player = cur_player
         
-        # горизонталь
-        cnt = 1
-        for i in range(1, self.win_len):
-            if c - i < 0 or board_arr[r, c - i] != val:
-                break
-            cnt += 1
-        for i in range(1, self.win_len):
-            if c + i >= self.size or board_arr[r, c + i] != val:
-                break
-            cnt += 1
-        if cnt >= self.win_len:
-            return True
+        if self.cand is None:
+            order = [i for i, v in enumerate(cells) if not v]
+            self.random.shuffle(order)
+        else:
+            # кандидаты меняются с каждым ходом - выбор на каждом шаге
+            order = iter(self._next_near, None)
+            played = []
         
-        # вертикаль
-        cnt = 1
-        for i in range(1, self.win_len):
-            if r - i < 0 or board_arr[r - i, c] != val:
-                break
-            cnt += 1
-        for i in range(1, self.win_len):
-            if r + i >= self.size or board_arr[r + i, c] != val:
+        result = 0
+        for idx in order:
+            cells[idx] = player
+            if self.cand is not None:
+                self.cand.add(idx)
+                played.append(idx)
+            
+            # длина серии через idx по каждому направлению
+            for fwd, back in rays[idx]:
+                run = 0
+                for c in fwd:
+                    if cells[c] != player:
+                        break
+                    run += 1
+                for c in back:
+                    if run >= need or cells[c] != player:
+                        break
+                    run += 1
+                if run >= need:
+                    result = 1 if player == 1 else -1
+                    break
+            if result:
                 break
-            cnt += 1
-        if cnt >= self.win_len:
-            return True
+            player = 3 - player
         
-        # диагональ /
-        cnt = 1
-        for i in range(1, self.win_len):
-            if r - i < 0 or c - i < 0 or board_arr[r - i, c - i] != val:
-                break
-            cnt += 1
-        for i in range(1, self.win_len):
-            if r + i >= self.size or c + i >= self.size or board_arr[r + i, c + i] != val:
-                break
-            cnt += 1
-        if cnt >= self.win_len:
-            return True
+        # вернуть кандидатов
+        if self.cand is not None:
+            for idx in played:
+                self.cand.remove(idx)
+        return result
+    
+    def _simulate_batch(self, board_arr: np.ndarray, cur_player: int,
+                        k: int) -> Tuple[float, float]:
+        # k симуляций сразу: доля побед игрока 1 и игрока 2
+        if self.cand is not None:
+            # кандидаты зависят от хода - по одной
+            res = [self._simulate_random(board_arr, cur_player) for _ in range(k)]
+            return res.count(1) / k, res.count(-1) / k
+        flat = board_arr.ravel()
+        empty = np.flatnonzero(flat == 0)
+        if not len(empty):
+            return 0.0, 0.0
         
-        # диагональ \
-        cnt = 1
-        for i in range(1, self.win_len):
-            if r - i < 0 or c + i >= self.size or board_arr[r - i, c + i] != val:
-                break
-            cnt += 1
-        for i in range(1, self.win_len):
-            if r + i >= self.size or c - i < 0 or board_arr[r + i, c - i] != val:
-                break
-            cnt += 1
+        # окна, где еще нет камней обоих игроков
+        windows = self.lines.windows
+        vals = flat[windows]
+        live = ~((vals == 1).any(axis=1) & (vals == 2).any(axis=1))
+        windows = windows[live]
+        if not len(windows):
+            return 0.0, 0.0
         
-        return cnt >= self.win_len
+        # случайная перестановка пустых клеток в каждой партии:
+        # ход клетки = ее место в перестановке, чей ход - по четности
+        rank = np.argsort(self.rng.random((k, len(empty))), axis=1).argsort(axis=1)
+        times = np.full((k, len(flat)), -1, dtype=np.int32)
+        times[:, empty] = rank
+        owner = np.broadcast_to(flat, (k, len(flat))).astype(np.int8)
+        owner[:, empty] = np.where(rank % 2 == 0, cur_player, 3 - cur_player)
+        
+        # окно собрано, когда поставлена его последняя клетка, если все
+        # клетки у одного игрока; побеждает окно, собранное раньше всех
+        own = owner[:, windows]
+        same = (own == own[:, :, :1]).all(axis=2)
+        done = np.where(same, times[:, windows].max(axis=2), len(empty))
+        first = done.argmin(axis=1)
+        rows = np.arange(k)
+        win = done[rows, first] < len(empty)
+        who = own[rows, first, 0][win]
+        return float((who == 1).sum()) / k, float((who == 2).sum()) / k
     
-    def _get_valid_moves(self, board_arr: np.ndarray) -> List[Tuple[int, int]]:
-        # получить допустимые ходы
-        moves = []
-        for r in range(self.size):
-            for c in range(self.size):
-                if board_arr[r, c] == 0:
-                    moves.append((r, c))
-        return moves
+    def _next_near(self) -> Optional[int]:
+        # случайный кандидат (None - ходов нет)
+        moves = self.cand.moves()
+        return self.random.choice(moves) if moves else None
     
-    def _simulate_random(self, board_arr: np.ndarray, cur_player: int) -> int:
-        # случайная симуляция
-        temp_board = board_arr.copy()
-        player = cur_player
-        
-        while True:
-            # проверить победу
-            for r in range(self.size):
-                for c in range(self.size):
-                    val = temp_board[r, c]
-                    if val != 0 and self._check_win(temp_board, r, c, val):
-                        return 1 if val == 1 else -1
-            
-            # проверить ничью
-            moves = self._get_valid_moves(temp_board)
-            if not moves:
-                return 0
-            
-            # случайный ход
-            r, c = random.choice(moves)
-            temp_board[r, c] = player
-            player = 3 - player
+    def _canon_key(self, board_arr: np.ndarray, player: int) -> Tuple[int, int]:
+        # ключ канонической позиции и номер преобразования
+        flat, t = self.sym_table.canonical(board_arr.ravel())
+        return self.zobrist.hash_grid(flat.tolist(), player), t
     
-    def _uct(self, wins: float, visits: int, parent_visits: int) -> float:
-        # формула UCT
-        if visits == 0:
-            return float('inf')
-        return (wins / visits) + self.exp_weight * math.sqrt(math.log(parent_visits) / visits)
+    def _moves(self, board_arr: np.ndarray, t: int) -> np.ndarray:
+        # ходы узла в координатах канонической доски; в симметричном режиме
+        # по одному ходу на класс, совпадающий при симметриях самой позиции
+        # (представитель - наименьший из ходов класса, что есть в moves:
+        # кандидаты не всегда замкнуты относительно симметрий)
+        moves = self._legal(board_arr, t)
+        if not self.symmetric or not len(moves):
+            return moves
+        table = self.sym_table
+        canon = board_arr.ravel()[table.perms[t]]
+        stab = [s for s in range(8) if np.array_equal(canon[table.perms[s]], canon)]
+        images = table.inv[stab][:, moves]
+        reps = np.where(np.isin(images, moves), images, len(canon)).min(axis=0)
+        return moves[reps == moves]
+    
+    def _legal(self, board_arr: np.ndarray, t: int) -> np.ndarray:
+        # допустимые ходы (индексы клеток) в координатах канонической доски
+        if self.cand is not None:
+            moves = np.array(self.cand.moves(), dtype=np.intp)
+        else:
+            moves = np.flatnonzero(board_arr.ravel() == 0)
+        return self.sym_table.inv[t][moves] if t else moves
+    
+    def _select(self, tree: ArrayTree, kids: range) -> int:
+        # ребенок с наибольшим UCT одним argmax по массивам детей;
+        # неисследованные (UCT = inf) первыми, равные - случайно из rng;
+        # посещения позиции - сумма по детям (их делят узлы-перестановки)
+        visits = tree.visits[kids.start:kids.stop]
+        best = np.flatnonzero(visits == 0)
+        if not len(best):
+            log_n = math.log(visits.sum())
+            uct = tree.wins[kids.start:kids.stop] / visits + \
+                self.exp_weight * np.sqrt(log_n / visits)
+            best = np.flatnonzero(uct == uct.max())
+        if len(best) == 1:
+            return kids.start + int(best[0])
+        return kids.start + int(best[self.rng.integers(len(best))])
     
     def get_move(self, board: Board, cur_sym: str) -> Dict:
         # получить ход через MCTS
-        board_str = self._board_to_state(board, cur_sym)
-        board_arr = self._state_to_board(board_str)
+        board_arr = self._board_to_arr(board, cur_sym)
+        if self.workers > 1:
+            moves, visits, _ = self._search_parallel(board_arr)
+        else:
+            moves, visits, _ = self._search(board_arr)
+        
+        # выбрать лучший ход
+        if not len(moves):
+            return {'action': None, 'row': -1, 'col': -1, 'r': -1, 'c': -1, 'conf': 0.0}
         
-        # начальное состояние
-        root_key = board_str + '1'
-        if root_key not in self.tree:
-            self.tree[root_key] = {'visits': 0, 'wins': 0.0, 'moves': {}}
+        k = int(visits.argmax())
+        best_visits = int(visits[k])
+        best_move = divmod(int(moves[k]), self.size)
         
-        # MCTS цикл
+        conf = min(1.0, best_visits / self.sims) if best_visits > 0 else 0.0
+        
+        return {
+            'action': best_move,
+            'row': best_move[0],
+            'col': best_move[1],
+            'r': best_move[0],
+            'c': best_move[1],
+            'conf': conf
+        }
+    
+    def _search_parallel(self, board_arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # корневой параллелизм: sims делятся между воркерами,
+        # посещения и победы одинаковых ходов корня складываются
+        params = {'size': self.size, 'win_len': self.win_len, 'sym': self.sym,
+                  'exp_weight': self.exp_weight, 'symmetric': self.symmetric,
+                  'radius': self.radius, 'batch': self.batch}
+        sims = -(-self.sims // self.workers)
+        seeds = self.rng.integers(2 ** 32, size=self.workers).tolist()
+        jobs = [(params, board_arr, sims, seed) for seed in seeds]
+        results = get_pool(self.workers).map(_root_search, jobs)
+        
+        moves = np.concatenate([res[0] for res in results])
+        if not len(moves):
+            return moves, np.zeros(0, dtype=np.int64), np.zeros(0)
+        cells, pos = np.unique(moves, return_inverse=True)
+        visits = np.bincount(pos, weights=np.concatenate([res[1] for res in results]))
+        wins = np.bincount(pos, weights=np.concatenate([res[2] for res in results]))
+        return cells, visits.astype(np.int64), wins
+    
+    def _search(self, board_arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # поиск в своем дереве: ходы корня (клетки доски), посещения, победы
+        if self.radius:
+            self.cand = Candidates.from_grid(board_arr, self.size, self.radius)
+        tree = self.tree
+        flat = board_arr.ravel()
+        
+        # начальное состояние; ходы узла - в координатах канонической
+        # доски его позиции, на доску через perms[t]
+        if self.symmetric:
+            root_key, root_t = self._canon_key(board_arr, 1)
+        else:
+            root_key = self.zobrist.hash_grid(flat.tolist())
+            root_t = 0
+        perms = self.sym_table.perms
+        cells, side = self.zobrist.cells, self.zobrist.side
+        root = tree.root(root_key)
+        if tree.first[root] < 0:
+            tree.expand(root, self._moves(board_arr, root_t), root_key)
+        
+        # MCTS цикл: одна доска, ходы пути отменяются после симуляции
         for _ in range(self.sims):
             # фаза выбора и расширения
-            sim_board = board_arr.copy()
             sim_player = 1
-            path = []
-            state_key = root_key
+            path = [root]
+            won = [[], []]  # узлы, где ход сделал игрок 1 / 2
+            played = []
+            node = root
+            key, t = root_key, root_t
+            result = None
             
             while True:
-                if state_key not in self.tree:
-                    self.tree[state_key] = {'visits': 0, 'wins': 0.0, 'moves': {}}
+                if node != root:
+                    if tree.visits[node] == 0:
+                        break
+                    if self.symmetric:
+                        key, t = self._canon_key(flat, sim_player)
+                # позиция уже раскрыта другим порядком ходов - общие дети
+                if tree.first[node] < 0 and not tree.share(node, key):
+                    tree.expand(node, self._moves(board_arr, t), key)
+                kids = tree.children(node)
+                if not kids:
                     break
                 
-                node = self.tree[state_key]
-                moves = self._get_valid_moves(sim_board)
-                
-                if not moves:
-                    break
-                
-                # найти неисследованные ходы
-                unexplored = []
-                for move in moves:
-                    move_key = f"{move[0]},{move[1]}"
-                    if move_key not in node['moves']:
-                        unexplored.append(move)
-                
-                if unexplored:
-                    # выбрать случайный неисследованный ход
-                    chosen_move = random.choice(unexplored)
-                else:
-                    # выбрать по UCT
-                    best_uct = -float('inf')
-                    chosen_move = None
-                    
-                    for move in moves:
-                        move_key = f"{move[0]},{move[1]}"
-                        stats = node['moves'][move_key]
-                        uct_val = self._uct(stats['wins'], stats['visits'], node['visits'])
-                        
-                        if uct_val > best_uct:
-                            best_uct = uct_val
-                            chosen_move = move
-                    
-                    if chosen_move is None:
-                        chosen_move = random.choice(moves)
-                
-                # записать ход
-                move_key = f"{chosen_move[0]},{chosen_move[1]}"
-                path.append((state_key, move_key, sim_player))
+                node = self._select(tree, kids)
                 
                 # сделать ход
-                r, c = chosen_move
-                sim_board[r, c] = sim_player
+                idx = int(perms[t][tree.move[node]])
+                key ^= cells[idx][sim_player] ^ side
+                flat[idx] = sim_player
+                played.append(idx)
+                if self.cand is not None:
+                    self.cand.add(idx)
+                path.append(node)
+                won[sim_player - 1].append(node)
                 
-                # обновить состояние
+                # победа на пути - симуляция не нужна
+                if self.lines.check_cell(flat, idx):
+                    result = 1 if sim_player == 1 else -1
+                    break
                 sim_player = 3 - sim_player
-                new_board_str = self._board_arr_to_str(sim_board)
-                state_key = new_board_str + str(sim_player)
             
-            # фаза симуляции
-            result = self._simulate_random(sim_board, sim_player)
+            # фаза симуляции: доли побед игроков 1 и 2
+            if result is not None:
+                shares = (1.0, 0.0) if result > 0 else (0.0, 1.0)
+            elif self.batch > 1:
+                shares = self._simulate_batch(board_arr, sim_player, self.batch)
+            else:
+                result = self._simulate_random(board_arr, sim_player)
+                shares = (float(result > 0), float(result < 0))
             
-            # обратное распространение
-            for state_key_back, move_key, player in path:
-                node = self.tree[state_key_back]
-                node['visits'] += 1
-                
-                if move_key not in node['moves']:
-                    node['moves'][move_key] = {'visits': 0, 'wins': 0.0}
-                
-                move_stats = node['moves'][move_key]
-                move_stats['visits'] += 1
-                
-                # награда
-                reward = result if player == 1 else -result
-                if reward > 0:
-                    node['wins'] += reward
-                    move_stats['wins'] += reward
-        
-        # выбрать лучший ход
-        root = self.tree[root_key]
-        moves = self._get_valid_moves(board_arr)
-        
-        if not moves:
-            return {'action': None, 'row': -1, 'col': -1, 'r': -1, 'c': -1, 'conf': 0.0}
-        
-        best_move = None
-        best_visits = -1
-        
-        for move in moves:
-            move_key = f"{move[0]},{move[1]}"
-            if move_key in root['moves']:
-                visits = root['moves'][move_key]['visits']
-                if visits > best_visits:
-                    best_visits = visits
-                    best_move = move
-        
-        if best_move is None:
-            best_move = random.choice(moves)
-        
-        conf = min(1.0, best_visits / self.sims) if best_visits > 0 else 0.0
+            # отменить ходы пути
+            for idx in played:
+                flat[idx] = 0
+                if self.cand is not None:
+                    self.cand.remove(idx)
+            
+            # обратное распространение: победа засчитывается сделавшему ход
+            tree.backup(path, won, shares)
         
-        return {
-            'action': best_move,
-            'row': best_move[0],
-            'col': best_move[1],
-            'r': best_move[0],
-            'c': best_move[1],
-            'conf': conf
-        }
+        self.cand = None
+        kids = tree.children(root)
+        return (perms[root_t][tree.moves(root)],
+                tree.visits[kids.start:kids.stop].copy(),
+                tree.wins[kids.start:kids.stop].copy())
     
     def reset_tree(self):
         # сбросить дерево
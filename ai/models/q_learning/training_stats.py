@@ -1,6 +1,13 @@
 import sys
 import os
+import io
 import time
+import queue
+import random
+import contextlib
+import multiprocessing
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
 
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_root)
@@ -16,18 +23,71 @@ cfg = {
     8: {'eps': 35000, 'save': 7000, 'wl': 5}
 }
 
-def train_all():
+
+def _train_job(args: Tuple) -> Dict[str, Any]:
+    # одна конфигурация в отдельном процессе; процессы пула - копии
+    # родителя с тем же состоянием ГСЧ, поэтому seed у каждой задачи свой
+    sz, sym, seed, progress_q = args
+    random.seed(seed)
+    np.random.seed(seed)
+    out = io.StringIO()
+    # печать обучения не перемешивается с другими процессами
+    with contextlib.redirect_stdout(out):
+        tm = TrainManager(size=sz, sym=sym)
+        stats = tm.train_vs_random(eps=cfg[sz]['eps'], save_every=cfg[sz]['save'],
+                                   progress=progress_q.put)
+    return {'size': sz, 'sym': sym, 'win_len': tm.win_len, 'seed': seed, **stats}
+
+
+def _print_progress(info: Dict[str, Any]) -> None:
+    print(f"[{info['size']}x{info['size']} {info['sym']}] "
+          f"эпизод {info['ep']}/{info['eps']}: "
+          f"побед={info['wins']}, поражений={info['loss']}, "
+          f"ничьих={info['draws']}, {info['time']:.1f} сек")
+
+
+def _print_summary(results: List[Dict[str, Any]], total: float) -> None:
+    print("=" * 60)
+    print(f"{'конфиг':<10}{'эпизоды':>9}{'побед':>8}{'пораж.':>8}"
+          f"{'ничьих':>8}{'сек':>9}")
+    for res in sorted(results, key=lambda r: (r['size'], r['sym'])):
+        name = f"{res['size']}x{res['size']} {res['sym']}"
+        print(f"{name:<10}{res['eps']:>9}{res['wins']:>8}{res['loss']:>8}"
+              f"{res['draws']:>8}{res['time']:>9.1f}")
+    print(f"Всего: {total:.1f} сек")
+
+
+def train_all(workers: Optional[int] = None,
+              sizes: Tuple[int, ...] = tuple(cfg),
+              seed: Optional[int] = None) -> Dict[str, Any]:
+    # все конфигурации - независимые задачи в пуле процессов
     start = time.time()
+    # длинные задачи первыми, чтобы пул загружался равномерно
+    jobs = [(sz, sym) for sz in sorted(sizes, key=lambda s: -cfg[s]['eps'])
+            for sym in ('O', 'X')]
+    workers = workers or min(len(jobs), os.cpu_count() or 1)
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
     
-    for sz in range(3, 9):
-        tm = TrainManager(size=sz, sym='O')
-        tm.train_vs_random(eps=cfg[sz]['eps'], save_every=cfg[sz]['save'])
-        
-        tm = TrainManager(size=sz, sym='X')
-        tm.train_vs_random(eps=cfg[sz]['eps'], save_every=cfg[sz]['save'])
+    with multiprocessing.Manager() as manager:
+        progress_q = manager.Queue()
+        with multiprocessing.Pool(workers) as pool:
+            pending = pool.map_async(_train_job, [(sz, sym, seed + i, progress_q)
+                                                  for i, (sz, sym) in enumerate(jobs)])
+            while True:
+                try:
+                    _print_progress(progress_q.get(timeout=0.5))
+                except queue.Empty:
+                    if pending.ready():
+                        break
+            results = pending.get()
+        while not progress_q.empty():
+            _print_progress(progress_q.get())
     
-    end = time.time()
-    return {'time': end - start}
+    total = time.time() - start
+    _print_summary(results, total)
+    return {'time': total, 'results': results}
+
 
 if __name__ == '__main__':
-    train_all()
+    train_all(int(sys.argv[1]) if len(sys.argv) > 1 else None)
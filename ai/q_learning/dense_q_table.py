@@ -0,0 +1,158 @@
+import numpy as np
+from typing import Dict, List, Tuple
+from ai.q_learning.q_table import QTable, StateKey
+
+
+class DenseQTable(QTable):
+    def __init__(self, size: int, win_len: int, lr: float = 0.1,
+                 gamma: float = 0.9, init_val: float = 0.0,
+                 zobrist: bool = False, symmetric: bool = False,
+                 capacity: int = 1024):
+        self.n_acts = size * size
+        self.index: Dict[StateKey, int] = {}  # ключ -> строка
+        self.n_rows = 0
+        self.values = np.empty((0, self.n_acts), dtype=np.float32)
+        self.seen = np.empty((0, self.n_acts), dtype=bool)  # обновленные Q
+        self.counts = np.empty(0, dtype=np.int64)           # посещения
+        self._capacity = capacity
+        # базовый __init__ присваивает table/visits -> выделение памяти
+        super().__init__(size, win_len, lr, gamma, init_val,
+                         zobrist=zobrist, symmetric=symmetric)
+
+    def _alloc(self, capacity: int) -> None:
+        # выделить память под capacity строк, сохранив старые
+        values = np.full((capacity, self.n_acts), self.init_val, dtype=np.float32)
+        seen = np.zeros((capacity, self.n_acts), dtype=bool)
+        counts = np.zeros(capacity, dtype=np.int64)
+        values[:self.n_rows] = self.values[:self.n_rows]
+        seen[:self.n_rows] = self.seen[:self.n_rows]
+        counts[:self.n_rows] = self.counts[:self.n_rows]
+        self.values, self.seen, self.counts = values, seen, counts
+
+    def row(self, state: StateKey, create: bool = False) -> int:
+        # строка состояния (-1 если нет)
+        row = self.index.get(state)
+        if row is not None:
+            return row
+        if not create:
+            return -1
+        if self.n_rows == len(self.values):
+            self._alloc(max(2 * len(self.values), 1))
+        row = self.n_rows
+        self.index[state] = row
+        self.n_rows += 1
+        return row
+
+    def clear(self) -> None:
+        # удалить все состояния
+        self.index = {}
+        self.n_rows = 0
+        self._alloc(self._capacity)
+
+    @property
+    def table(self) -> Dict[StateKey, Dict[int, float]]:
+        # словарный вид (для save/stats), только обновленные Q
+        # (по seen: set_q записывает Q и без посещений)
+        res = {}
+        for key, row in self.index.items():
+            acts = np.flatnonzero(self.seen[row])
+            if len(acts):
+                res[key] = {int(a): float(self.values[row, a]) for a in acts}
+        return res
+
+    @table.setter
+    def table(self, table: Dict[StateKey, Dict[int, float]]) -> None:
+        # загрузить из словаря
+        self.clear()
+        if len(table) > len(self.values):
+            self._alloc(len(table))
+        for key, acts in table.items():
+            row = self.row(key, create=True)
+            for a, v in acts.items():
+                self.values[row, int(a)] = v
+                self.seen[row, int(a)] = True
+
+    @property
+    def visits(self) -> Dict[StateKey, int]:
+        return {key: int(self.counts[row])
+                for key, row in self.index.items() if self.counts[row]}
+
+    @visits.setter
+    def visits(self, visits: Dict[StateKey, int]) -> None:
+        for key, cnt in visits.items():
+            # row() может перевыделить массивы - строку до обращения к counts
+            row = self.row(key, create=True)
+            self.counts[row] = cnt
+
+    def get_q(self, state: StateKey, action: int) -> float:
+        # получить Q-значение
+        row = self.index.get(state)
+        if row is None:
+            return self.init_val
+        return float(self.values[row, action])
+
+    def update(self, state: StateKey, action: int, reward: float,
+               next_state: StateKey, next_actions: List[int]) -> None:
+        # обновить Q-значение
+        row = self.row(state, create=True)
+        cur_q = self.values[row, action]
+
+        max_next = 0.0
+        if next_actions:
+            nrow = self.index.get(next_state)
+            if nrow is None:
+                max_next = self.init_val
+            else:
+                max_next = self.values[nrow, next_actions].max()
+
+        self.values[row, action] = cur_q + self.lr * (reward + self.gamma * max_next - cur_q)
+        self.seen[row, action] = True
+        self.counts[row] += 1
+
+    def set_q(self, state: StateKey, action: int, value: float,
+              visits: int = 0) -> None:
+        # записать Q-значение и добавить посещения (слияние из процессов)
+        row = self.row(state, create=True)
+        self.values[row, action] = value
+        self.seen[row, action] = True
+        self.counts[row] += visits
+
+    def update_batch(self, rows: np.ndarray, acts: np.ndarray,
+                     rews: np.ndarray, next_rows: np.ndarray,
+                     next_mask: np.ndarray) -> None:
+        # обновить батч за один проход: TD-цели с маскированным max
+        cur_q = self.values[rows, acts]
+        next_q = np.where(next_mask, self.values[next_rows], -np.inf).max(axis=1)
+        next_q = np.where(next_mask.any(axis=1), next_q, 0.0)
+
+        # повторы (s, a) в батче: остается последнее значение
+        self.values[rows, acts] = cur_q + self.lr * (rews + self.gamma * next_q - cur_q)
+        self.seen[rows, acts] = True
+        np.add.at(self.counts, rows, 1)
+
+    def best_action(self, state: StateKey, actions: List[int],
+                    eps: float = 0.0) -> Tuple[int, float]:
+        # выбрать лучший ход: argmax по строке среди допустимых
+        if not actions:
+            return None, 0.0
+
+        if np.random.random() < eps:
+            act = np.random.choice(actions)
+            return act, self.get_q(state, act)
+
+        row = self.index.get(state)
+        if row is None:
+            return actions[0], self.init_val
+        vals = self.values[row, actions]
+        best = int(vals.argmax())
+        return actions[best], float(vals[best])
+
+    def stats(self) -> Dict:
+        # получить статистику
+        return {
+            'states': int((self.counts[:self.n_rows] > 0).sum()),
+            'actions': int(self.seen[:self.n_rows].sum()),
+            'size': self.size,
+            'win_len': self.win_len,
+            'bytes': int(self.values.nbytes + self.seen.nbytes + self.counts.nbytes)
+        }
@@ -0,0 +1,245 @@
+import os
+import pickle
+import numpy as np
+from typing import Dict, List, Tuple
+from ai.q_learning.q_table import QTable, StateKey, decode_state
+
+# формат .qfz (npz): минимальный совершенный хеш (CHD) по ключам состояний,
+# для каждого состояния - лучший ход и его Q; ключи - для проверки попадания
+MASK64 = (1 << 64) - 1
+PRIME64 = 0xFFFFFFFFFFFFFFC5  # свертка длинных ключей base-3 в 64 бита
+
+
+def _mix_int(fp: int, seed: int) -> int:
+    # splitmix64 от (отпечаток, seed)
+    x = (fp ^ (seed * 0x9E3779B97F4A7C15)) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def _mix_arr(fp: np.ndarray, seed: int) -> np.ndarray:
+    # то же для массива uint64 (умножение по модулю 2^64)
+    x = fp ^ np.uint64((seed * 0x9E3779B97F4A7C15) & MASK64)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def build_chd(fps: np.ndarray) -> np.ndarray:
+    # seeds по корзинам: s > 0 - позиция mix(fp, s) % n, s < 0 - позиция -s-1
+    n = len(fps)
+    n_buckets = max(n, 1)
+    seeds = np.zeros(n_buckets, dtype=np.int32)
+    if not n:
+        return seeds
+    bucket = (_mix_arr(fps, 0) % np.uint64(n_buckets)).astype(np.intp)
+    order = np.argsort(bucket, kind='stable')
+    starts = np.flatnonzero(np.r_[True, np.diff(bucket[order]) != 0])
+    groups = np.split(order, starts[1:])
+    # большие корзины первыми, пока свободных мест много
+    groups.sort(key=len, reverse=True)
+
+    taken = np.zeros(n, dtype=bool)
+    g = 0
+    while g < len(groups) and len(groups[g]) > 1:
+        members = fps[groups[g]]
+        for s in range(1, 1 << 31):
+            pos = (_mix_arr(members, s) % np.uint64(n)).astype(np.intp)
+            if not taken[pos].any() and len(np.unique(pos)) == len(pos):
+                break
+        taken[pos] = True
+        seeds[bucket[groups[g][0]]] = s
+        g += 1
+    # корзины из одного ключа - сразу в свободную клетку
+    free = np.flatnonzero(~taken)
+    for i, grp in enumerate(groups[g:]):
+        seeds[bucket[grp[0]]] = -int(free[i]) - 1
+    return seeds
+
+
+def best_moves(q: QTable) -> Tuple[List[StateKey], np.ndarray, np.ndarray]:
+    # лучший допустимый ход и его Q для каждого состояния таблицы;
+    # по хешу Зобриста доска (и неопробованные ходы) не восстанавливается
+    if q.zobrist:
+        raise ValueError("ключи Зобриста не декодируются")
+    table = q.table
+    keys = sorted(table)
+    acts = np.zeros(len(keys), dtype=np.int16)
+    vals = np.zeros(len(keys), dtype=np.float32)
+    for i, key in enumerate(keys):
+        legal = np.flatnonzero(decode_state(key, q.size)[0].ravel() == 0).tolist()
+        acts[i], vals[i] = q.best_action(key, legal or sorted(table[key]))
+    return keys, acts, vals
+
+
+class FrozenQTable(QTable):
+    def __init__(self, size: int, win_len: int, seeds: np.ndarray,
+                 keys: np.ndarray, acts: np.ndarray, vals: np.ndarray,
+                 init_val: float = 0.0, zobrist: bool = False,
+                 symmetric: bool = False):
+        # таблица только для игры: один хеш и одно чтение массива на ход
+        super().__init__(size, win_len, init_val=init_val,
+                         zobrist=zobrist, symmetric=symmetric)
+        self.seeds = seeds      # (n,) int32 - смещения корзин
+        self.keys = keys        # (n,) S{w} - ключи big-endian
+        self.acts = acts        # (n,) int16 - лучший ход
+        self.vals = vals        # (n,) float32 - его Q
+        self.n = len(keys)
+        self.key_w = keys.dtype.itemsize
+
+    @classmethod
+    def freeze(cls, q: QTable) -> 'FrozenQTable':
+        # заморозить обученную таблицу
+        keys, acts, vals = best_moves(q)
+        key_w = max(1, (max(keys, default=0).bit_length() + 7) // 8)
+        fps = np.array([k % PRIME64 for k in keys], dtype=np.uint64)
+        seeds = build_chd(fps)
+        # перестановка в порядок позиций хеша
+        slots = np.array([cls._slot_of(seeds, len(keys), int(fp)) for fp in fps],
+                         dtype=np.intp)
+        key_arr = np.empty(len(keys), dtype=f'S{key_w}')
+        key_arr[slots] = [k.to_bytes(key_w, 'big') for k in keys]
+        out_acts, out_vals = np.empty_like(acts), np.empty_like(vals)
+        out_acts[slots], out_vals[slots] = acts, vals
+        return cls(q.size, q.win_len, seeds, key_arr, out_acts, out_vals,
+                   init_val=q.init_val, zobrist=q.zobrist, symmetric=q.symmetric)
+
+    @staticmethod
+    def _slot_of(seeds: np.ndarray, n: int, fp: int) -> int:
+        # позиция отпечатка в массивах
+        s = int(seeds[_mix_int(fp, 0) % len(seeds)])
+        if s < 0:
+            return -s - 1
+        return _mix_int(fp, s) % n
+
+    @property
+    def table(self) -> Dict[StateKey, Dict[int, float]]:
+        # словарный вид: только лучший ход каждого состояния
+        return {int.from_bytes(k.ljust(self.key_w, b'\0'), 'big'): {int(a): float(v)}
+                for k, a, v in zip(self.keys, self.acts, self.vals)}
+
+    @table.setter
+    def table(self, table: Dict) -> None:
+        if table:
+            raise RuntimeError("FrozenQTable только для чтения")
+
+    @property
+    def visits(self) -> Dict[StateKey, int]:
+        return {}
+
+    @visits.setter
+    def visits(self, visits: Dict) -> None:
+        if visits:
+            raise RuntimeError("FrozenQTable только для чтения")
+
+    def row(self, state: StateKey) -> int:
+        # позиция состояния (-1 если нет)
+        if not self.n or state < 0 or state.bit_length() > 8 * self.key_w:
+            return -1
+        pos = self._slot_of(self.seeds, self.n, state % PRIME64)
+        # numpy отбрасывает нули в конце S-строк
+        if self.keys[pos] == state.to_bytes(self.key_w, 'big').rstrip(b'\0'):
+            return pos
+        return -1
+
+    def get_q(self, state: StateKey, action: int) -> float:
+        # Q известно только для лучшего хода
+        pos = self.row(state)
+        if pos < 0 or self.acts[pos] != action:
+            return self.init_val
+        return float(self.vals[pos])
+
+    def update(self, state: StateKey, action: int, reward: float,
+               next_state: StateKey, next_actions: List[int]) -> None:
+        raise RuntimeError("FrozenQTable только для чтения")
+
+    def best_action(self, state: StateKey, actions: List[int],
+                    eps: float = 0.0) -> Tuple[int, float]:
+        # выбрать лучший ход: готовый ответ из массива
+        if not actions:
+            return None, 0.0
+
+        if np.random.random() < eps:
+            act = np.random.choice(actions)
+            return act, self.get_q(state, act)
+
+        pos = self.row(state)
+        if pos < 0 or int(self.acts[pos]) not in actions:
+            return actions[0], self.init_val
+        return int(self.acts[pos]), float(self.vals[pos])
+
+    def save(self, name: str = None) -> str:
+        # сохранить рядом с .pkl той же модели
+        if name is None:
+            name = f"q_{self.size}x{self.size}_win{self.win_len}"
+        path = frozen_path(self, name)
+        meta = np.array([self.size, self.win_len, self.zobrist, self.symmetric],
+                        dtype=np.int64)
+        with open(path, 'wb') as f:
+            np.savez(f, meta=meta, init_val=np.float64(self.init_val),
+                     seeds=self.seeds, keys=self.keys, acts=self.acts, vals=self.vals)
+        print(f"Сохранено: {name} -> {path}")
+        return path
+
+    @classmethod
+    def open(cls, path: str) -> 'FrozenQTable':
+        # прочитать файл .qfz
+        with np.load(path) as data:
+            size, win_len, zobrist, symmetric = data['meta'].tolist()
+            return cls(size, win_len, data['seeds'], data['keys'], data['acts'],
+                       data['vals'], init_val=float(data['init_val']),
+                       zobrist=bool(zobrist), symmetric=bool(symmetric))
+
+    def load(self, name: str) -> bool:
+        # открыть другой файл .qfz
+        path = frozen_path(self, name)
+        if not os.path.exists(path):
+            print(f"Файл не найден: {path}")
+            return False
+        self.__dict__.update(self.open(path).__dict__)
+        return True
+
+    def stats(self) -> Dict:
+        # получить статистику
+        return {
+            'states': self.n,
+            'actions': self.n,
+            'size': self.size,
+            'win_len': self.win_len,
+            'bytes': int(self.seeds.nbytes + self.keys.nbytes
+                         + self.acts.nbytes + self.vals.nbytes)
+        }
+
+
+def frozen_path(q: QTable, name: str) -> str:
+    # путь к .qfz рядом с .pkl той же модели
+    return os.path.splitext(q._get_model_path(name))[0] + '.qfz'
+
+
+def freeze_all(models_dir: str) -> List[str]:
+    # заморозить все .pkl модели папки
+    done = []
+    for fname in sorted(os.listdir(models_dir)):
+        if not fname.endswith('.pkl'):
+            continue
+        with open(os.path.join(models_dir, fname), 'rb') as f:
+            data = pickle.load(f)
+        q = QTable(data['size'], data['win_len'])
+        q._get_model_path = lambda name: os.path.join(models_dir, f"{name}.pkl")
+        name = fname[:-4]
+        if q.load(name):
+            if q.zobrist:
+                print(f"Пропущено (ключи Зобриста): {name}")
+                continue
+            frozen = FrozenQTable.freeze(q)
+            frozen._get_model_path = q._get_model_path
+            done.append(frozen.save(name))
+    return done
+
+
+if __name__ == '__main__':
+    import sys
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root, 'models', 'q_learning')
+    print(f"Заморожено: {len(freeze_all(target))}")
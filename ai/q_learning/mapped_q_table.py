@@ -0,0 +1,212 @@
+import os
+import pickle
+import struct
+import numpy as np
+from typing import Dict, List, Tuple
+from ai.q_learning.q_table import QTable, StateKey
+
+# формат .qtb: заголовок, отсортированные ключи (big-endian, фиксированная
+# ширина), матрица Q float32 (NaN - не обновлялось), посещения int64
+MAGIC = b'QTBL'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQIIIddd')
+HEADER_SIZE = 64
+FLAG_ZOBRIST = 1
+FLAG_SYMMETRIC = 2
+
+
+def _align(pos: int) -> int:
+    # выравнивание секций по 8 байт
+    return (pos + 7) // 8 * 8
+
+
+def _layout(n_states: int, n_acts: int, key_w: int) -> Tuple[int, int, int]:
+    # смещения ключей, значений и посещений
+    keys_off = HEADER_SIZE
+    vals_off = _align(keys_off + n_states * key_w)
+    visits_off = _align(vals_off + n_states * n_acts * 4)
+    return keys_off, vals_off, visits_off
+
+
+def binary_path(q: QTable, name: str) -> str:
+    # путь к .qtb рядом с .pkl той же модели
+    return os.path.splitext(q._get_model_path(name))[0] + '.qtb'
+
+
+def save_mapped(q: QTable, path: str) -> str:
+    # записать таблицу в бинарном формате
+    table, visits = q.table, q.visits
+    keys = sorted(set(table) | set(visits))
+    n_acts = q.size * q.size
+    key_w = max(1, (max(keys, default=0).bit_length() + 7) // 8)
+
+    key_arr = np.array([k.to_bytes(key_w, 'big') for k in keys], dtype=f'S{key_w}')
+    vals = np.full((len(keys), n_acts), np.nan, dtype=np.float32)
+    counts = np.zeros(len(keys), dtype=np.int64)
+    for row, key in enumerate(keys):
+        for a, v in table.get(key, {}).items():
+            vals[row, int(a)] = v
+        counts[row] = visits.get(key, 0)
+
+    flags = (FLAG_ZOBRIST if q.zobrist else 0) | (FLAG_SYMMETRIC if q.symmetric else 0)
+    header = HEADER.pack(MAGIC, VERSION, q.size, q.win_len, len(keys), n_acts,
+                         key_w, flags, q.lr, q.gamma, q.init_val)
+    keys_off, vals_off, visits_off = _layout(len(keys), n_acts, key_w)
+
+    # запись во временный файл и замена: читатели не видят половину файла
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header.ljust(HEADER_SIZE, b'\0'))
+        f.write(key_arr.tobytes())
+        f.seek(vals_off)
+        f.write(vals.tobytes())
+        f.seek(visits_off)
+        f.write(counts.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+class MappedQTable(QTable):
+    def __init__(self, path: str):
+        # таблица только для чтения поверх np.memmap: процессы делят
+        # одну копию в page cache, загрузка не читает файл целиком
+        with open(path, 'rb') as f:
+            head = f.read(HEADER_SIZE)
+        if len(head) < HEADER.size:
+            raise ValueError(f"не файл .qtb: {path}")
+        (magic, version, size, win_len, n_states, n_acts,
+         key_w, flags, lr, gamma, init_val) = HEADER.unpack_from(head)
+        if magic != MAGIC:
+            raise ValueError(f"не файл .qtb: {path}")
+        if version != VERSION:
+            raise ValueError(f"версия .qtb {version} не поддерживается")
+
+        super().__init__(size, win_len, lr, gamma, init_val,
+                         zobrist=bool(flags & FLAG_ZOBRIST),
+                         symmetric=bool(flags & FLAG_SYMMETRIC))
+        self.path = path
+        self.n_states = n_states
+        self.key_w = key_w
+
+        keys_off, vals_off, visits_off = _layout(n_states, n_acts, key_w)
+        if n_states:
+            self.keys = np.memmap(path, dtype=f'S{key_w}', mode='r',
+                                  offset=keys_off, shape=(n_states,))
+            self.values = np.memmap(path, dtype=np.float32, mode='r',
+                                    offset=vals_off, shape=(n_states, n_acts))
+            self.counts = np.memmap(path, dtype=np.int64, mode='r',
+                                    offset=visits_off, shape=(n_states,))
+        else:
+            # memmap не умеет пустые массивы
+            self.keys = np.empty(0, dtype=f'S{key_w}')
+            self.values = np.empty((0, n_acts), dtype=np.float32)
+            self.counts = np.empty(0, dtype=np.int64)
+
+    @property
+    def table(self) -> Dict[StateKey, Dict[int, float]]:
+        # словарный вид (для save/stats), читает весь файл
+        res = {}
+        for row in range(self.n_states):
+            acts = np.flatnonzero(~np.isnan(self.values[row]))
+            if len(acts):
+                key = int.from_bytes(self.keys[row].ljust(self.key_w, b'\0'), 'big')
+                res[key] = {int(a): float(self.values[row, a]) for a in acts}
+        return res
+
+    @table.setter
+    def table(self, table: Dict) -> None:
+        if table:
+            raise RuntimeError("MappedQTable только для чтения")
+
+    @property
+    def visits(self) -> Dict[StateKey, int]:
+        return {int.from_bytes(self.keys[row].ljust(self.key_w, b'\0'), 'big'):
+                int(self.counts[row])
+                for row in np.flatnonzero(self.counts)}
+
+    @visits.setter
+    def visits(self, visits: Dict) -> None:
+        if visits:
+            raise RuntimeError("MappedQTable только для чтения")
+
+    def row(self, state: StateKey) -> int:
+        # строка состояния бинарным поиском (-1 если нет)
+        if state < 0 or state.bit_length() > 8 * self.key_w:
+            return -1
+        kb = state.to_bytes(self.key_w, 'big')
+        row = int(np.searchsorted(self.keys, kb))
+        # numpy отбрасывает нули в конце S-строк
+        if row < self.n_states and self.keys[row] == kb.rstrip(b'\0'):
+            return row
+        return -1
+
+    def get_q(self, state: StateKey, action: int) -> float:
+        # получить Q-значение
+        row = self.row(state)
+        if row < 0:
+            return self.init_val
+        val = float(self.values[row, action])
+        return self.init_val if val != val else val
+
+    def update(self, state: StateKey, action: int, reward: float,
+               next_state: StateKey, next_actions: List[int]) -> None:
+        raise RuntimeError("MappedQTable только для чтения")
+
+    def best_action(self, state: StateKey, actions: List[int],
+                    eps: float = 0.0) -> Tuple[int, float]:
+        # выбрать лучший ход: argmax по строке среди допустимых
+        if not actions:
+            return None, 0.0
+
+        if np.random.random() < eps:
+            act = np.random.choice(actions)
+            return act, self.get_q(state, act)
+
+        row = self.row(state)
+        if row < 0:
+            return actions[0], self.init_val
+        vals = np.nan_to_num(self.values[row, actions], nan=self.init_val)
+        best = int(vals.argmax())
+        return actions[best], float(vals[best])
+
+    def load(self, name: str) -> bool:
+        # открыть другой файл .qtb
+        path = binary_path(self, name)
+        if not os.path.exists(path):
+            print(f"Файл не найден: {path}")
+            return False
+        self.__init__(path)
+        return True
+
+    def stats(self) -> Dict:
+        # получить статистику
+        return {
+            'states': int((~np.isnan(self.values)).any(axis=1).sum()),
+            'actions': int((~np.isnan(self.values)).sum()),
+            'size': self.size,
+            'win_len': self.win_len,
+            'bytes': os.path.getsize(self.path)
+        }
+
+
+def convert_all(models_dir: str) -> List[str]:
+    # перевести все .pkl модели папки в .qtb
+    done = []
+    for fname in sorted(os.listdir(models_dir)):
+        if not fname.endswith('.pkl'):
+            continue
+        with open(os.path.join(models_dir, fname), 'rb') as f:
+            data = pickle.load(f)
+        q = QTable(data['size'], data['win_len'])
+        q._get_model_path = lambda name: os.path.join(models_dir, f"{name}.pkl")
+        name = fname[:-4]
+        if q.load(name):
+            done.append(save_mapped(q, binary_path(q, name)))
+    return done
+
+
+if __name__ == '__main__':
+    import sys
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    target = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root, 'models', 'q_learning')
+    print(f"Сконвертировано: {len(convert_all(target))}")
@@ -0,0 +1,173 @@
+import os
+import numpy as np
+from typing import Dict, List, Sequence, Tuple
+from ai.q_learning.q_table import QTable, StateKey
+from ai.q_learning.frozen_q_table import best_moves
+from core.symmetry import get_symmetry
+
+# формат .qpa (npy): запись на каждую доску, индекс - число base-3 доски;
+# move = ход * 2 + бит символа (-1 - нет хода), val - Q хода;
+# только 3x3: у 4x4 3^16 записей (129 МБ), почти все - недостижимые доски
+MAX_CELLS = 9
+ENTRY = np.dtype([('move', 'i1'), ('val', '<f2')])
+
+
+def _powers(n: int) -> np.ndarray:
+    # веса разрядов base-3 (первая клетка - старший разряд)
+    return 3 ** np.arange(n - 1, -1, -1, dtype=np.int64)
+
+
+def policy_path(q: QTable, name: str) -> str:
+    # путь к .qpa рядом с .pkl той же модели
+    return os.path.splitext(q._get_model_path(name))[0] + '.qpa'
+
+
+class PolicyTable(QTable):
+    def __init__(self, size: int, win_len: int, data: np.ndarray,
+                 init_val: float = 0.0):
+        # прямая адресация: ход агента - одно чтение массива, без хеша
+        if size * size > MAX_CELLS:
+            raise ValueError(f"size*size > {MAX_CELLS}")
+        if len(data) != 3 ** (size * size):
+            raise ValueError(f"нужно {3 ** (size * size)} записей")
+        super().__init__(size, win_len, init_val=init_val)
+        self.data = data
+        self.moves = data['move']
+        self.vals = data['val']
+
+    @classmethod
+    def empty(cls, size: int, win_len: int) -> 'PolicyTable':
+        # таблица без ходов
+        if size * size > MAX_CELLS:
+            raise ValueError(f"size*size > {MAX_CELLS}")
+        data = np.zeros(3 ** (size * size), dtype=ENTRY)
+        data['move'] = -1
+        return cls(size, win_len, data)
+
+    @classmethod
+    def from_moves(cls, size: int, win_len: int, keys: Sequence[StateKey],
+                   acts: Sequence[int], vals: Sequence[float],
+                   symmetric: bool = False) -> 'PolicyTable':
+        # заполнить по ключам base-3; symmetric - ключи канонические,
+        # записываются все 8 вариантов доски
+        table = cls.empty(size, win_len)
+        keys = np.asarray(keys, dtype=np.int64)
+        acts = np.asarray(acts, dtype=np.intp)
+        vals = np.asarray(vals, dtype=np.float32)
+        if not symmetric:
+            table.data['move'][keys >> 1] = acts * 2 + (keys & 1)
+            table.data['val'][keys >> 1] = vals
+            return table
+
+        n = size * size
+        pows = _powers(n)
+        digits = (keys[:, None] >> 1) // pows % 3
+        sym = get_symmetry(size)
+        for t in range(8):
+            # вариант доски: v[i] = canon[perms[t][i]], ход a -> inv[t][a]
+            nums = digits[:, sym.perms[t]] @ pows
+            table.data['move'][nums] = sym.inv[t][acts] * 2 + (keys & 1)
+            table.data['val'][nums] = vals
+        return table
+
+    @classmethod
+    def from_qtable(cls, q: QTable) -> 'PolicyTable':
+        # лучшие ходы обученной таблицы
+        if q.zobrist:
+            raise ValueError("ключи Зобриста не адресуются напрямую")
+        keys, acts, vals = best_moves(q)
+        table = cls.from_moves(q.size, q.win_len, keys, acts, vals,
+                               symmetric=q.symmetric)
+        table.init_val = q.init_val
+        return table
+
+    @property
+    def table(self) -> Dict[StateKey, Dict[int, float]]:
+        # словарный вид: только лучший ход каждого состояния
+        idx = np.flatnonzero(self.moves >= 0)
+        return {int(i) * 2 + int(self.moves[i] & 1):
+                {int(self.moves[i] >> 1): float(self.vals[i])} for i in idx}
+
+    @table.setter
+    def table(self, table: Dict) -> None:
+        if table:
+            raise RuntimeError("PolicyTable только для чтения")
+
+    @property
+    def visits(self) -> Dict[StateKey, int]:
+        return {}
+
+    @visits.setter
+    def visits(self, visits: Dict) -> None:
+        if visits:
+            raise RuntimeError("PolicyTable только для чтения")
+
+    def move(self, state: StateKey) -> int:
+        # ход для состояния (-1 если нет)
+        m = int(self.moves[state >> 1])
+        if m < 0 or (m & 1) != (state & 1):
+            return -1
+        return m >> 1
+
+    def get_q(self, state: StateKey, action: int) -> float:
+        # Q известно только для лучшего хода
+        if self.move(state) != action:
+            return self.init_val
+        return float(self.vals[state >> 1])
+
+    def update(self, state: StateKey, action: int, reward: float,
+               next_state: StateKey, next_actions: List[int]) -> None:
+        raise RuntimeError("PolicyTable только для чтения")
+
+    def best_action(self, state: StateKey, actions: List[int],
+                    eps: float = 0.0) -> Tuple[int, float]:
+        # выбрать лучший ход: готовый ответ из массива
+        if not actions:
+            return None, 0.0
+
+        if np.random.random() < eps:
+            act = np.random.choice(actions)
+            return act, self.get_q(state, act)
+
+        act = self.move(state)
+        if act < 0 or act not in actions:
+            return actions[0], self.init_val
+        return act, float(self.vals[state >> 1])
+
+    def save(self, name: str = None) -> str:
+        # сохранить рядом с .pkl той же модели
+        if name is None:
+            name = f"q_{self.size}x{self.size}_win{self.win_len}"
+        path = policy_path(self, name)
+        with open(path, 'wb') as f:
+            np.save(f, np.asarray(self.data))
+        print(f"Сохранено: {name} -> {path}")
+        return path
+
+    @classmethod
+    def open(cls, path: str, win_len: int) -> 'PolicyTable':
+        # прочитать .qpa (3x3 - 59 КБ, целиком в память)
+        data = np.load(path, mmap_mode='r')
+        if data.dtype != ENTRY or len(data) != 3 ** MAX_CELLS:
+            raise ValueError(f"не файл .qpa: {path}")
+        return cls(3, win_len, np.array(data))
+
+    def load(self, name: str) -> bool:
+        # открыть другой файл .qpa
+        path = policy_path(self, name)
+        if not os.path.exists(path):
+            print(f"Файл не найден: {path}")
+            return False
+        self.__dict__.update(self.open(path, self.win_len).__dict__)
+        return True
+
+    def stats(self) -> Dict:
+        # получить статистику
+        states = int((self.moves >= 0).sum())
+        return {
+            'states': states,
+            'actions': states,
+            'size': self.size,
+            'win_len': self.win_len,
+            'bytes': int(self.data.nbytes)
+        }
@@ -1,15 +1,33 @@
+import os
 import numpy as np
-from typing import List, Tuple, Dict
+from typing import Dict, List, Optional, Tuple
 from collections import deque
 import random
 from core.board import Board
-from ai.q_learning.q_table import QTable
+from core.candidates import candidate_mask
+from ai.q_learning.q_table import QTable, StateKey
+from ai.q_learning.dense_q_table import DenseQTable
+from ai.q_learning.replay_buffer import ReplayBuffer
+from ai.q_learning.mapped_q_table import MappedQTable, binary_path, save_mapped
+from ai.q_learning.frozen_q_table import FrozenQTable, frozen_path
+from ai.q_learning.policy_table import MAX_CELLS, PolicyTable, policy_path
+
+
+def _mtime(path: str) -> Optional[float]:
+    # время изменения файла (None - файла нет)
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
 
 class QAgent:
     def __init__(self, size: int, win_len: int, sym: str = 'O',
                  lr: float = 0.1, gamma: float = 0.9,
                  eps: float = 0.1, eps_decay: float = 0.995,
-                 eps_min: float = 0.01):
+                 eps_min: float = 0.01, zobrist: bool = False,
+                 symmetric: bool = False, dense: bool = False,
+                 radius: int = None):
         self.size = size          # размер доски
         self.win_len = win_len    # длина для победы
         self.sym = sym            # символ агента
@@ -21,41 +39,47 @@ class QAgent:
         self.eps_decay = eps_decay  # затухание epsilon
         self.eps_min = eps_min    # минимальный epsilon
         
-        self.q = QTable(size, win_len, lr, gamma)  # Q-таблица
-        self.buffer = deque(maxlen=10000)  # буфер опыта
+        # Q-таблица: dense=True - хранение в матрице numpy
+        table_cls = DenseQTable if dense else QTable
+        self.q = table_cls(size, win_len, lr, gamma, zobrist=zobrist,
+                           symmetric=symmetric)
         self.batch = 32                     # размер батча
+        if dense:
+            # кольцевые массивы numpy, обновление батча одним проходом
+            self.buffer = ReplayBuffer(10000, size * size)
+        else:
+            self.buffer = deque(maxlen=10000)  # буфер опыта
         
         self.last_s = None  # последнее состояние
         self.last_a = None  # последнее действие
+        self.radius = radius  # ходы только рядом с камнями (None - все)
     
     def _possible_acts(self, board: np.ndarray) -> List[int]:
         # возвращает список возможных действий
-        acts = []
-        for r in range(self.size):
-            for c in range(self.size):
-                if board[r][c] == 0:
-                    acts.append(r * self.size + c)
-        return acts
+        if self.radius:
+            return np.flatnonzero(candidate_mask(board, self.size, self.radius)).tolist()
+        return np.flatnonzero(np.asarray(board).ravel() == 0).tolist()
     
-    def _to_state(self, board: Board, cur_sym: str) -> Tuple[str, np.ndarray]:
-        # преобразует доску в состояние
-        arr = np.zeros((self.size, self.size), dtype=int)
-        
-        for r in range(self.size):
-            for c in range(self.size):
-                cell = board.get_cell(r, c)
-                if cell == 'X':
-                    arr[r][c] = 1
-                elif cell == 'O':
-                    arr[r][c] = 2
-        
-        key = self.q.get_key(arr, cur_sym)
-        return key, arr
+    def _to_state(self, board: Board,
+                  cur_sym: str) -> Tuple[StateKey, np.ndarray, int]:
+        # преобразует доску в состояние (0-пусто, 1-X, 2-O как в Board.grid);
+        # в симметричном режиме доска и действия - в канонических координатах
+        return self.q.state_key(board, cur_sym)
     
     def choose(self, board: Board, cur_sym: str, 
                train: bool = False) -> Tuple[Tuple[int, int], float]:
         # выбирает действие
-        state_key, arr = self._to_state(board, cur_sym)
+        state_key, arr, t = self._to_state(board, cur_sym)
+        return self._choose(state_key, arr, t, train)
+    
+    def choose_grid(self, grid: np.ndarray, cur_sym: str,
+                    train: bool = False) -> Tuple[Tuple[int, int], float]:
+        # выбирает действие по сетке 0/1/2 (векторная среда)
+        state_key, arr, t = self.q.grid_key(grid, cur_sym)
+        return self._choose(state_key, arr, t, train)
+    
+    def _choose(self, state_key: StateKey, arr: np.ndarray, t: int,
+                train: bool) -> Tuple[Tuple[int, int], float]:
         acts = self._possible_acts(arr)
         
         if not acts:
@@ -64,7 +88,8 @@ class QAgent:
         eps = self.eps if train else 0.0
         act_key, val = self.q.best_action(state_key, acts, eps)
         
-        action = self.q.int_to_action(act_key)
+        # вернуть действие в координаты исходной доски
+        action = self.q.int_to_action(self.q.sym_table.from_canonical(t, act_key))
         
         if train:
             self.last_s = state_key
@@ -78,16 +103,10 @@ class QAgent:
         if self.last_s is None or self.last_a is None:
             return
         
-        new_key, new_arr = self._to_state(new_board, new_sym)
+        new_key, new_arr, _ = self._to_state(new_board, new_sym)
         next_acts = [] if done else self._possible_acts(new_arr)
         
-        exp = (self.last_s, self.last_a, rew, new_key, next_acts, done)
-        self.buffer.append(exp)
-        
-        if len(self.buffer) >= self.batch:
-            batch = random.sample(self.buffer, self.batch)
-            for s, a, r, ns, na, d in batch:
-                self.q.update(s, a, r, ns, na)
+        self.learn((self.last_s, self.last_a, rew, new_key, next_acts, done))
         
         if done and self.eps > self.eps_min:
             self.eps *= self.eps_decay
@@ -96,6 +115,25 @@ class QAgent:
         self.last_s = None
         self.last_a = None
     
+    def learn(self, exp: Tuple) -> None:
+        # добавить опыт (s, a, r, s', действия s', done) и обучить на батче
+        if isinstance(self.buffer, ReplayBuffer):
+            # строки плотной таблицы вместо ключей
+            s, a, r, ns, na, d = exp
+            s_row = self.q.row(s, create=True)
+            ns_row = self.q.row(ns, create=True)
+            self.buffer.add(s_row, a, r, ns_row, na)
+            
+            if len(self.buffer) >= self.batch:
+                self.q.update_batch(*self.buffer.sample(self.batch))
+        else:
+            self.buffer.append(exp)
+            
+            if len(self.buffer) >= self.batch:
+                batch = random.sample(self.buffer, self.batch)
+                for s, a, r, ns, na, d in batch:
+                    self.q.update(s, a, r, ns, na)
+    
     def get_move(self, board: Board, cur_sym: str) -> Dict:
         # получает ход для игры (без обучения)
         action, val = self.choose(board, cur_sym, train=False)
@@ -119,6 +157,52 @@ class QAgent:
             name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}"
         return self.q.save(name)
     
-    def load(self, name: str) -> bool:
-        # загружает агента
+    def save_mapped(self, name: str = None) -> str:
+        # сохраняет агента в бинарном формате .qtb (для сервера)
+        if name is None:
+            name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}"
+        path = save_mapped(self.q, binary_path(self.q, name))
+        print(f"Сохранено: {name} -> {path}")
+        return path
+    
+    def freeze(self, name: str = None) -> str:
+        # сохраняет замороженную таблицу .qfz (лучший ход на состояние)
+        if name is None:
+            name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}"
+        frozen = FrozenQTable.freeze(self.q)
+        frozen._get_model_path = self.q._get_model_path
+        return frozen.save(name)
+    
+    def save_policy(self, name: str = None) -> str:
+        # сохраняет массив политики .qpa (только 3x3)
+        if name is None:
+            name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}"
+        policy = PolicyTable.from_qtable(self.q)
+        policy._get_model_path = self.q._get_model_path
+        return policy.save(name)
+    
+    def load(self, name: str, mapped: bool = False) -> bool:
+        # загружает агента; mapped=True - для игры: таблицы только для чтения
+        # (массив политики .qpa, замороженная .qfz, .qtb через memmap),
+        # если они не старше .pkl той же модели; иначе - pickle для обучения
+        if mapped:
+            readers = [(frozen_path(self.q, name), FrozenQTable.open),
+                       (binary_path(self.q, name), MappedQTable)]
+            if self.size * self.size <= MAX_CELLS:
+                readers.insert(0, (policy_path(self.q, name),
+                                   lambda p: PolicyTable.open(p, self.win_len)))
+            pkl_time = _mtime(self.q._get_model_path(name))
+            for path, reader in readers:
+                if not os.path.exists(path):
+                    continue
+                if pkl_time is not None and (_mtime(path) or 0.0) < pkl_time:
+                    # после переобучения файл не пересобран
+                    print(f"Устарел: {path}")
+                    continue
+                try:
+                    self.q = reader(path)
+                    print(f"Загружено: {name} -> {path}")
+                    return True
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Ошибка загрузки {name}: {e}")
         return self.q.load(name)
@@ -2,24 +2,81 @@ import json
 import os
 import pickle
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
+from core.board import Board
+from core.symmetry import get_symmetry
+from core.zobrist import get_zobrist
+
+# ключ состояния: число base-3 по клеткам * 2 + бит символа (или хеш Зобриста)
+StateKey = int
+
+
+def encode_state(board: np.ndarray, symbol: str) -> int:
+    # клетки 0/1/2 -> цифры base-3 (первая клетка - старший разряд)
+    digits = np.asarray(board, dtype=np.uint8).ravel() + ord('0')
+    num = int(digits.tobytes().decode('ascii'), 3)
+    return num * 2 + (1 if symbol == 'O' else 0)
+
+
+def decode_state(key: int, size: int) -> Tuple[np.ndarray, str]:
+    # обратное преобразование: доска и символ
+    symbol = 'O' if key & 1 else 'X'
+    num = key >> 1
+    flat = np.zeros(size * size, dtype=np.int8)
+    for idx in range(size * size - 1, -1, -1):
+        num, flat[idx] = divmod(num, 3)
+    return flat.reshape(size, size), symbol
+
+
+def legacy_key_to_int(key: str) -> int:
+    # старый строковый ключ "0102..._O" -> число
+    board_str, symbol = key.rsplit('_', 1)
+    return int(board_str, 3) * 2 + (1 if symbol == 'O' else 0)
+
 
 class QTable:
     def __init__(self, size: int, win_len: int, lr: float = 0.1, 
-                 gamma: float = 0.9, init_val: float = 0.0):
+                 gamma: float = 0.9, init_val: float = 0.0,
+                 zobrist: bool = False, symmetric: bool = False):
         self.size = size
         self.win_len = win_len
         self.lr = lr
         self.gamma = gamma
         self.init_val = init_val
-        self.table: Dict[str, Dict[int, float]] = {}
-        self.visits: Dict[str, int] = {}
+        # zobrist=True - ключ состояния это 64-битный хеш доски
+        self.zobrist = zobrist
+        # symmetric=True - одно состояние на 8 поворотов/отражений доски
+        self.symmetric = symmetric
+        self.sym_table = get_symmetry(size)
+        self.table: Dict[StateKey, Dict[int, float]] = {}
+        self.visits: Dict[StateKey, int] = {}
+        # журнал изменений (по запросу): (s, a) -> [Q до изменения, обновлений]
+        self.log: Optional[Dict[Tuple[StateKey, int], List]] = None
     
-    def get_key(self, board: np.ndarray, symbol: str) -> str:
-        # ключ состояния
-        board_str = ''.join(str(cell) for row in board for cell in row)
-        return f"{board_str}_{symbol}"
+    def get_key(self, board: np.ndarray, symbol: str) -> StateKey:
+        # ключ состояния прямо из сетки 0/1/2
+        return encode_state(board, symbol)
+    
+    def state_key(self, board: Board,
+                  symbol: str) -> Tuple[StateKey, np.ndarray, int]:
+        # ключ, доска в системе координат таблицы и номер преобразования
+        if self.zobrist and not self.symmetric:
+            return board.zobrist_key(symbol), board.grid, 0
+        return self.grid_key(board.grid, symbol)
+    
+    def grid_key(self, grid: np.ndarray,
+                 symbol: str) -> Tuple[StateKey, np.ndarray, int]:
+        # то же по сетке 0/1/2 без объекта Board
+        arr, t = grid, 0
+        if self.symmetric:
+            flat, t = self.sym_table.canonical(grid.ravel())
+            arr = flat.reshape(self.size, self.size)
+        if self.zobrist:
+            to_move = 2 if symbol == 'O' else 1
+            key = get_zobrist(self.size).hash_grid(arr.ravel().tolist(), to_move)
+            return key, arr, t
+        return self.get_key(arr, symbol), arr, t
     
     def action_to_int(self, action: Tuple[int, int]) -> int:
         r, c = action
@@ -30,14 +87,14 @@ class QTable:
         c = key % self.size
         return (r, c)
     
-    def get_q(self, state: str, action: int) -> float:
+    def get_q(self, state: StateKey, action: int) -> float:
         # получить Q-значение
         if state not in self.table:
             return self.init_val
         return self.table[state].get(action, self.init_val)
     
-    def update(self, state: str, action: int, reward: float, 
-               next_state: str, next_actions: List[int]) -> None:
+    def update(self, state: StateKey, action: int, reward: float, 
+               next_state: StateKey, next_actions: List[int]) -> None:
         # обновить Q-значение
         cur_q = self.get_q(state, action)
         
@@ -48,13 +105,29 @@ class QTable:
         
         new_q = cur_q + self.lr * (reward + self.gamma * max_next - cur_q)
         
+        if self.log is not None:
+            entry = self.log.get((state, action))
+            if entry is None:
+                self.log[(state, action)] = [cur_q, 1]
+            else:
+                entry[1] += 1
+        
         if state not in self.table:
             self.table[state] = {}
         self.table[state][action] = new_q
         
         self.visits[state] = self.visits.get(state, 0) + 1
     
-    def best_action(self, state: str, actions: List[int], 
+    def set_q(self, state: StateKey, action: int, value: float,
+              visits: int = 0) -> None:
+        # записать Q-значение и добавить посещения (слияние из процессов)
+        if state not in self.table:
+            self.table[state] = {}
+        self.table[state][action] = value
+        if visits:
+            self.visits[state] = self.visits.get(state, 0) + visits
+    
+    def best_action(self, state: StateKey, actions: List[int], 
                    eps: float = 0.0) -> Tuple[int, float]:
         # выбрать лучший ход
         if not actions:
@@ -99,7 +172,10 @@ class QTable:
             'visits': self.visits,
             'lr': self.lr,
             'gamma': self.gamma,
-            'init_val': self.init_val
+            'init_val': self.init_val,
+            'zobrist': self.zobrist,
+            'symmetric': self.symmetric,
+            'key_format': 'base3'
         }
         
         path = self._get_model_path(name)
@@ -122,11 +198,19 @@ class QTable:
             with open(path, 'rb') as f:
                 data = pickle.load(f)
             
-            self.table = data.get('table', {})
-            self.visits = data.get('visits', {})
             self.lr = data.get('lr', self.lr)
             self.gamma = data.get('gamma', self.gamma)
             self.init_val = data.get('init_val', self.init_val)
+            self.zobrist = data.get('zobrist', False)
+            self.symmetric = data.get('symmetric', False)
+            
+            table = data.get('table', {})
+            visits = data.get('visits', {})
+            if data.get('key_format') != 'base3' and not self.zobrist:
+                # старые модели со строковыми ключами
+                table, visits = self.migrate(table, visits)
+            self.table = table
+            self.visits = visits
             
             print(f"Загружено: {name}, состояний: {len(self.table)}")
             return True
@@ -135,6 +219,21 @@ class QTable:
             print(f"Ошибка загрузки {name}: {e}")
             return False
     
+    @staticmethod
+    def migrate(table: Dict, visits: Dict) -> Tuple[Dict, Dict]:
+        # перевести строковые ключи в числа, действия - в int
+        new_table = {}
+        for key, acts in table.items():
+            if isinstance(key, str):
+                key = legacy_key_to_int(key)
+            new_table[key] = {int(a): float(v) for a, v in acts.items()}
+        new_visits = {}
+        for key, cnt in visits.items():
+            if isinstance(key, str):
+                key = legacy_key_to_int(key)
+            new_visits[key] = cnt
+        return new_table, new_visits
+    
     def stats(self) -> Dict:
         # получить статистику
         total_states = len(self.table)
@@ -0,0 +1,38 @@
+import random
+import numpy as np
+from typing import List, Tuple
+
+
+class ReplayBuffer:
+    def __init__(self, capacity: int, n_acts: int):
+        # кольцевой буфер опыта в заранее выделенных массивах
+        self.capacity = capacity
+        self.s_rows = np.zeros(capacity, dtype=np.int64)    # строка состояния
+        self.acts = np.zeros(capacity, dtype=np.int64)      # действие
+        self.rews = np.zeros(capacity, dtype=np.float32)    # награда
+        self.ns_rows = np.zeros(capacity, dtype=np.int64)   # строка след. состояния
+        self.next_mask = np.zeros((capacity, n_acts), dtype=bool)  # след. действия
+        self.pos = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, s_row: int, act: int, rew: float, ns_row: int,
+            next_acts: List[int]) -> None:
+        # добавить переход, перезаписывая самый старый
+        i = self.pos
+        self.s_rows[i] = s_row
+        self.acts[i] = act
+        self.rews[i] = rew
+        self.ns_rows[i] = ns_row
+        self.next_mask[i] = False
+        self.next_mask[i, next_acts] = True
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, k: int) -> Tuple[np.ndarray, ...]:
+        # случайный батч без повторов
+        idx = np.array(random.sample(range(self.size), k))
+        return (self.s_rows[idx], self.acts[idx], self.rews[idx],
+                self.ns_rows[idx], self.next_mask[idx])
@@ -0,0 +1,144 @@
+import sys
+from typing import Dict, List, Optional
+from core.lines import get_lines
+from core.symmetry import get_symmetry
+from ai.q_learning.q_table import QTable
+from ai.q_learning.policy_table import MAX_CELLS as POLICY_CELLS, PolicyTable
+
+# точное решение малых досок: негамакс с памятью по каноническим позициям
+# оценка для ходящего: 1 + пустых после победного хода, 0 - ничья
+MAX_CELLS = 16  # до 4x4
+
+
+class Solver:
+    def __init__(self, size: int, win_len: int):
+        if size * size > MAX_CELLS:
+            raise ValueError(f"size*size > {MAX_CELLS}")
+        self.size = size
+        self.win_len = win_len
+        self.n = size * size
+        # клетка -> окна через нее (без самой клетки)
+        lines = get_lines(size, win_len)
+        self.cell_lines = tuple(
+            tuple(tuple(c for c in line if c != idx) for line in lines.cell_lines[idx].tolist())
+            for idx in range(self.n))
+        # вес клетки j в числе base-3 каждого из 8 вариантов доски:
+        # вариант t: v[i] = g[perms[t][i]], клетка j стоит на месте inv[t][j]
+        sym = get_symmetry(size)
+        pows = [3 ** (self.n - 1 - i) for i in range(self.n)]
+        self.weights = tuple(tuple(pows[int(sym.inv[t][j])] for t in range(8))
+                             for j in range(self.n))
+        self.memo: Dict[int, int] = {}  # каноническое число -> оценка
+
+    def _wins(self, cells: List[int], idx: int, val: int) -> bool:
+        # собрано ли окно через клетку idx
+        for line in self.cell_lines[idx]:
+            if all(cells[c] == val for c in line):
+                return True
+        return False
+
+    def _negamax(self, cells: List[int], keys: List[int], val: int, empty: int) -> int:
+        # оценка позиции для ходящего val (1 - X, 2 - O)
+        canon = min(keys)
+        res = self.memo.get(canon)
+        if res is not None:
+            return res
+        best = -self.n - 1
+        for idx in range(self.n):
+            if cells[idx]:
+                continue
+            score = self._child(cells, keys, val, empty, idx)
+            if score > best:
+                best = score
+        self.memo[canon] = best
+        return best
+
+    def _child(self, cells: List[int], keys: List[int], val: int,
+               empty: int, idx: int) -> int:
+        # оценка хода idx для ходящего
+        cells[idx] = val
+        if self._wins(cells, idx, val):
+            score = empty
+        elif empty == 1:
+            score = 0
+        else:
+            w = self.weights[idx]
+            child = [k + val * w[t] for t, k in enumerate(keys)]
+            score = -self._negamax(cells, child, 3 - val, empty - 1)
+        cells[idx] = 0
+        return score
+
+    def _keys(self, cells: List[int]) -> List[int]:
+        # числа base-3 всех 8 вариантов доски
+        keys = [0] * 8
+        for idx, val in enumerate(cells):
+            if val:
+                for t, w in enumerate(self.weights[idx]):
+                    keys[t] += val * w
+        return keys
+
+    def solve(self) -> int:
+        # оценка пустой доски для X
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, self.n * 4 + 100))
+        try:
+            return self._negamax([0] * self.n, [0] * 8, 1, self.n)
+        finally:
+            sys.setrecursionlimit(limit)
+
+    def action_values(self, num: int) -> Dict[int, int]:
+        # оценки всех ходов позиции (канонической) по числу base-3
+        cells = [(num // 3 ** (self.n - 1 - i)) % 3 for i in range(self.n)]
+        val = 1 if cells.count(1) == cells.count(2) else 2
+        keys = self._keys(cells)
+        empty = cells.count(0)
+        return {idx: self._child(cells, keys, val, empty, idx)
+                for idx in range(self.n) if not cells[idx]}
+
+    def to_qtable(self, sym: str) -> QTable:
+        # Q-таблица ходов sym: Q = оценка / size^2, ключи канонические
+        if not self.memo:
+            self.solve()
+        q = QTable(self.size, self.win_len, symmetric=True)
+        val = 1 if sym == 'X' else 2
+        bit = 1 if sym == 'O' else 0
+        for num in self.memo:
+            cells_x, cells_o = self._counts(num)
+            if (1 if cells_x == cells_o else 2) != val:
+                continue
+            acts = self.action_values(num)
+            q.table[num * 2 + bit] = {a: s / self.n for a, s in acts.items()}
+            q.visits[num * 2 + bit] = 1
+        return q
+
+    def _counts(self, num: int) -> tuple:
+        # число X и O на доске
+        cnt = [0, 0, 0]
+        for _ in range(self.n):
+            num, d = divmod(num, 3)
+            cnt[d] += 1
+        return cnt[1], cnt[2]
+
+
+def solve(size: int, win_len: int, sym: str,
+          name: Optional[str] = None) -> QTable:
+    # решить и сохранить модель под именем, которое ищет web_api
+    solver = Solver(size, win_len)
+    solver.solve()
+    q = solver.to_qtable(sym)
+    if name is None:
+        name = f"q_{size}x{size}_win{win_len}_{sym}"
+    q.save(name)
+    if size * size <= POLICY_CELLS:
+        # массив политики - только для 3x3
+        policy = PolicyTable.from_qtable(q)
+        policy._get_model_path = q._get_model_path
+        policy.save(name)
+    return q
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    win_len = int(sys.argv[2]) if len(sys.argv) > 2 else size
+    for sym in ('X', 'O'):
+        solve(size, win_len, sym)
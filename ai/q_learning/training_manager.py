@@ -1,12 +1,46 @@
 import numpy as np
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import multiprocessing
+import os
+import random
 import time
 from core.game import Game
 from core.game_state import GameState
 from ai.q_learning.q_agent import QAgent
+from ai.q_learning.vec_env import VecEnv
+
+def _selfplay_worker(conn, args: Tuple) -> None:
+    # процесс самоигры: своя копия Q-таблицы, обучение на своем опыте;
+    # за раунд принимает слитые Q, отдает изменения Q (дельты) и итоги
+    size, win_len, sym, flags, table, seed = args
+    random.seed(seed)
+    np.random.seed(seed)
+    
+    tm = TrainManager(size=size, win_len=win_len, sym=sym)
+    q = tm.agent.q
+    q.zobrist, q.symmetric, tm.agent.radius = flags
+    q.table = table
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        merged, eps, n_eps = msg
+        for (s, a), val in merged.items():
+            q.set_q(s, a, val)
+        tm.agent.eps = eps
+        tm.stats = {'eps': 0, 'wins': 0, 'loss': 0, 'draws': 0}
+        q.log = {}
+        for _ in range(n_eps):
+            tm._play_episode()
+        delta = {sa: (q.get_q(*sa) - old, n) for sa, (old, n) in q.log.items()}
+        q.log = None
+        conn.send((delta, tm.stats))
+    conn.close()
+
 
 class TrainManager:
-    def __init__(self, size: int = 3, win_len: int = None, sym: str = 'O'):
+    def __init__(self, size: int = 3, win_len: int = None, sym: str = 'O',
+                 dense: bool = False, radius: int = None):
         self.size = size
         self.win_len = self._calc_win_len(size, win_len)
         self.sym = sym
@@ -19,7 +53,9 @@ class TrainManager:
             gamma=0.9,
             eps=0.2,
             eps_decay=0.9995,
-            eps_min=0.01
+            eps_min=0.01,
+            dense=dense,  # плотная таблица + батч-обновление буфера
+            radius=radius  # ходы агента только рядом с камнями
         )
         
         self.stats = {'eps': 0, 'wins': 0, 'loss': 0, 'draws': 0}
@@ -37,121 +73,140 @@ class TrainManager:
         else:
             return 5
     
-    def train_vs_random(self, eps: int = 1000, save_every: int = 100) -> Dict[str, Any]:
-        start = time.time()
+    def _play_episode(self) -> None:
+        # одна партия против случайного игрока
+        game = Game(size=self.size, win_len=self.win_len)
+        done = False
         
-        for ep in range(eps):
-            game = Game(size=self.size, win_len=self.win_len)
-            done = False
+        while not done:
+            cur_board = game.get_board()
+            cur_player = game.cur_player.sym
             
-            while not done:
-                cur_board = game.get_board()
-                cur_player = game.cur_player.sym
+            # Проверка на конец игры
+            if game.state != GameState.PLAYING:
+                break
+            
+            if cur_player == self.sym:
+                # Ход ИИ
+                action, _ = self.agent.choose(cur_board, cur_player, train=True)
                 
-                # Проверка на конец игры
-                if game.state != GameState.PLAYING:
+                if action is None:
+                    # Нет ходов - ничья
+                    done = True
+                    rew = self.rews['draw']
+                    self.stats['draws'] += 1
+                    self.agent.reward(rew, cur_board, cur_player, True)
                     break
                 
-                if cur_player == self.sym:
-                    # Ход ИИ
-                    action, _ = self.agent.choose(cur_board, cur_player, train=True)
-                    
-                    if action is None:
-                        # Нет ходов - ничья
-                        done = True
-                        rew = self.rews['draw']
-                        self.stats['draws'] += 1
-                        self.agent.reward(rew, cur_board, cur_player, True)
-                        break
-                    
-                    r, c = action
-                    if not game.move(r, c):
-                        # Некорректный ход
-                        done = True
-                        break
-                    
-                    new_board = game.get_board()
-                    new_player = game.cur_player.sym
-                    
-                    # Проверка результата
-                    if game.state == GameState.WIN_X:
-                        if self.sym == 'X':
-                            rew = self.rews['win']
-                            self.stats['wins'] += 1
-                        else:
-                            rew = self.rews['lose']
-                            self.stats['loss'] += 1
-                        done = True
-                    elif game.state == GameState.WIN_O:
-                        if self.sym == 'O':
-                            rew = self.rews['win']
-                            self.stats['wins'] += 1
-                        else:
-                            rew = self.rews['lose']
-                            self.stats['loss'] += 1
-                        done = True
-                    elif game.state == GameState.DRAW:
-                        rew = self.rews['draw']
-                        self.stats['draws'] += 1
-                        done = True
-                    else:
-                        rew = self.rews['step']
-                    
-                    self.agent.reward(rew, new_board, new_player, done)
+                r, c = action
+                if not game.move(r, c):
+                    # Некорректный ход
+                    done = True
+                    break
+                
+                new_board = game.get_board()
+                new_player = game.cur_player.sym
                 
+                # Проверка результата
+                if game.state == GameState.WIN_X:
+                    if self.sym == 'X':
+                        rew = self.rews['win']
+                        self.stats['wins'] += 1
+                    else:
+                        rew = self.rews['lose']
+                        self.stats['loss'] += 1
+                    done = True
+                elif game.state == GameState.WIN_O:
+                    if self.sym == 'O':
+                        rew = self.rews['win']
+                        self.stats['wins'] += 1
+                    else:
+                        rew = self.rews['lose']
+                        self.stats['loss'] += 1
+                    done = True
+                elif game.state == GameState.DRAW:
+                    rew = self.rews['draw']
+                    self.stats['draws'] += 1
+                    done = True
                 else:
-                    # Ход случайного игрока
-                    moves = []
-                    for rr in range(self.size):
-                        for cc in range(self.size):
-                            if cur_board.is_valid(rr, cc):
-                                moves.append((rr, cc))
-                    
-                    if not moves:
-                        # Нет ходов - ничья
-                        done = True
-                        rew = self.rews['draw']
-                        self.stats['draws'] += 1
-                        # Даем награду ИИ за ничью
-                        self.agent.reward(rew, cur_board, cur_player, True)
-                        break
-                    
-                    r, c = moves[np.random.randint(len(moves))]
-                    game.move(r, c)
-                    
-                    # Проверка результата после хода random
-                    if game.state == GameState.WIN_X:
-                        if self.sym == 'X':
-                            rew = self.rews['lose']  # Random выиграл за X
-                            self.stats['loss'] += 1
-                        else:
-                            rew = self.rews['win']   # Random выиграл за O (противник ИИ)
-                            self.stats['wins'] += 1
-                        done = True
-                        # Даем финальную награду ИИ
-                        self.agent.reward(rew, game.get_board(), game.cur_player.sym, True)
-                    elif game.state == GameState.WIN_O:
-                        if self.sym == 'O':
-                            rew = self.rews['lose']  # Random выиграл за O
-                            self.stats['loss'] += 1
-                        else:
-                            rew = self.rews['win']   # Random выиграл за X (противник ИИ)
-                            self.stats['wins'] += 1
-                        done = True
-                        self.agent.reward(rew, game.get_board(), game.cur_player.sym, True)
-                    elif game.state == GameState.DRAW:
-                        rew = self.rews['draw']
-                        self.stats['draws'] += 1
-                        done = True
-                        self.agent.reward(rew, game.get_board(), game.cur_player.sym, True)
+                    rew = self.rews['step']
+                
+                self.agent.reward(rew, new_board, new_player, done)
             
-            self.stats['eps'] += 1
+            else:
+                # Ход случайного игрока
+                moves = []
+                for rr in range(self.size):
+                    for cc in range(self.size):
+                        if cur_board.is_valid(rr, cc):
+                            moves.append((rr, cc))
+                
+                if not moves:
+                    # Нет ходов - ничья
+                    done = True
+                    rew = self.rews['draw']
+                    self.stats['draws'] += 1
+                    # Даем награду ИИ за ничью
+                    self.agent.reward(rew, cur_board, cur_player, True)
+                    break
+                
+                r, c = moves[np.random.randint(len(moves))]
+                game.move(r, c)
+                
+                # Проверка результата после хода random
+                if game.state == GameState.WIN_X:
+                    if self.sym == 'X':
+                        rew = self.rews['lose']  # Random выиграл за X
+                        self.stats['loss'] += 1
+                    else:
+                        rew = self.rews['win']   # Random выиграл за O (противник ИИ)
+                        self.stats['wins'] += 1
+                    done = True
+                    # Даем финальную награду ИИ
+                    self.agent.reward(rew, game.get_board(), game.cur_player.sym, True)
+                elif game.state == GameState.WIN_O:
+                    if self.sym == 'O':
+                        rew = self.rews['lose']  # Random выиграл за O
+                        self.stats['loss'] += 1
+                    else:
+                        rew = self.rews['win']   # Random выиграл за X (противник ИИ)
+                        self.stats['wins'] += 1
+                    done = True
+                    self.agent.reward(rew, game.get_board(), game.cur_player.sym, True)
+                elif game.state == GameState.DRAW:
+                    rew = self.rews['draw']
+                    self.stats['draws'] += 1
+                    done = True
+                    self.agent.reward(rew, game.get_board(), game.cur_player.sym, True)
+        
+        self.stats['eps'] += 1
+    
+    def train_vs_random(self, eps: int = 1000, save_every: int = 100,
+                        progress: Optional[Callable[[Dict[str, Any]], None]] = None
+                        ) -> Dict[str, Any]:
+        # progress - получает словарь прогресса вместо печати
+        start = time.time()
+        
+        for ep in range(eps):
+            self._play_episode()
             
             if (ep + 1) % 100 == 0:
-                print(f"Эпизод {ep+1}/{eps}: "
-                      f"побед={self.stats['wins']}, "
-                      f"поражений={self.stats['loss']}, "
-                      f"ничьих={self.stats['draws']}")
+                if progress is not None:
+                    progress({
+                        'size': self.size,
+                        'sym': self.sym,
+                        'ep': ep + 1,
+                        'eps': eps,
+                        'wins': self.stats['wins'],
+                        'loss': self.stats['loss'],
+                        'draws': self.stats['draws'],
+                        'time': time.time() - start
+                    })
+                else:
+                    print(f"Эпизод {ep+1}/{eps}: "
+                          f"побед={self.stats['wins']}, "
+                          f"поражений={self.stats['loss']}, "
+                          f"ничьих={self.stats['draws']}")
             
             if (ep + 1) % save_every == 0:
                 name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}_ep{ep+1}"
@@ -166,5 +221,163 @@ class TrainManager:
         
         return self.stats
     
+    def train_parallel(self, eps: int = 1000, save_every: int = 100,
+                       workers: Optional[int] = None,
+                       chunk: int = 25) -> Dict[str, Any]:
+        # процессы играют и учатся на своих копиях таблицы; здесь только
+        # слияние дельт Q, обратно рассылаются лишь измененные значения
+        start = time.time()
+        workers = workers or os.cpu_count() or 1
+        q = self.agent.q
+        flags = (q.zobrist, q.symmetric, self.agent.radius)
+        seed = np.random.randint(2 ** 31)
+        played = 0
+        next_save = save_every
+        
+        # снимок таблицы передается процессам один раз при запуске
+        table = q.table
+        conns = []
+        procs = []
+        for i in range(workers):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(
+                target=_selfplay_worker, daemon=True,
+                args=(child, (self.size, self.win_len, self.sym, flags, table, seed + i)))
+            proc.start()
+            child.close()
+            conns.append(parent)
+            procs.append(proc)
+        
+        merged: Dict[Tuple[int, int], float] = {}
+        try:
+            while played < eps:
+                # раунд не переходит через точку сохранения; слитые Q
+                # получают все процессы, даже без эпизодов в раунде
+                left = min(eps, next_save) - played
+                sizes = [max(0, min(chunk, left - i * chunk)) for i in range(workers)]
+                for conn, n in zip(conns, sizes):
+                    conn.send((merged, self.agent.eps, n))
+                
+                # дельты одного (s, a) из разных процессов складываются -
+                # как если бы их опыт применялся подряд
+                changes: Dict[Tuple[int, int], List] = {}
+                for conn in conns:
+                    delta, st = conn.recv()
+                    for sa, (dv, n) in delta.items():
+                        acc = changes.get(sa)
+                        if acc is None:
+                            changes[sa] = [dv, n]
+                        else:
+                            acc[0] += dv
+                            acc[1] += n
+                    for k in ('eps', 'wins', 'loss', 'draws'):
+                        self.stats[k] += st[k]
+                
+                merged = {}
+                for (s, a), (dv, n) in changes.items():
+                    val = q.get_q(s, a) + dv
+                    q.set_q(s, a, val, n)
+                    merged[(s, a)] = val
+                
+                played += sum(sizes)
+                # затухание epsilon как при обычном обучении
+                self.agent.eps = max(self.agent.eps_min,
+                                     self.agent.eps * self.agent.eps_decay ** sum(sizes))
+                
+                print(f"Эпизод {played}/{eps}: "
+                      f"побед={self.stats['wins']}, "
+                      f"поражений={self.stats['loss']}, "
+                      f"ничьих={self.stats['draws']}")
+                
+                if played == next_save:
+                    name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}_ep{played}"
+                    self.agent.save(name)
+                    next_save += save_every
+        finally:
+            for conn in conns:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass  # процесс уже завершился
+                conn.close()
+            for proc in procs:
+                proc.join()
+        
+        final_name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}_final"
+        self.agent.save(final_name)
+        
+        end = time.time()
+        self.stats['time'] = end - start
+        print(f"Обучение завершено за {self.stats['time']:.1f} сек")
+        
+        return self.stats
+    
+    def train_vectorized(self, eps: int = 1000, save_every: int = 100,
+                         n_envs: int = 64,
+                         seed: Optional[int] = None) -> Dict[str, Any]:
+        # n_envs партий идут синхронно в VecEnv, агент учится на каждом шаге
+        start = time.time()
+        env = VecEnv(n_envs, self.size, self.win_len, self.sym, self.rews, seed)
+        agent = self.agent
+        shape = (self.size, self.size)
+        cells = env.reset()
+        finished = 0
+        next_save = save_every
+        next_print = 100
+        
+        while finished < eps:
+            # ходы агента по всем доскам
+            keys = []
+            act_keys = []
+            acts = np.empty(n_envs, dtype=np.int64)
+            for i in range(n_envs):
+                action, _ = agent.choose_grid(cells[i].reshape(shape), self.sym, train=True)
+                keys.append(agent.last_s)
+                act_keys.append(agent.last_a)  # в координатах таблицы
+                acts[i] = self.size * action[0] + action[1]
+            
+            rewards, done, results, next_cells = env.step(acts)
+            
+            for i in range(n_envs):
+                new_key, new_arr, _ = agent.q.grid_key(next_cells[i].reshape(shape), self.sym)
+                next_acts = [] if done[i] else agent._possible_acts(new_arr)
+                agent.learn((keys[i], act_keys[i], float(rewards[i]),
+                             new_key, next_acts, bool(done[i])))
+            
+            # за шаг заканчивается много партий: в итоги идут только партии
+            # до ближайшей точки сохранения (и не больше eps), так что
+            # ни одна точка не перескакивается
+            ended = np.flatnonzero(done)[:min(eps, next_save) - finished]
+            n_done = len(ended)
+            finished += n_done
+            self.stats['eps'] += n_done
+            self.stats['wins'] += int((results[ended] == 1).sum())
+            self.stats['loss'] += int((results[ended] == -1).sum())
+            self.stats['draws'] += int((results[ended] == 0).sum())
+            agent.eps = max(agent.eps_min, agent.eps * agent.eps_decay ** n_done)
+            
+            if finished >= next_print:
+                print(f"Эпизод {finished}/{eps}: "
+                      f"побед={self.stats['wins']}, "
+                      f"поражений={self.stats['loss']}, "
+                      f"ничьих={self.stats['draws']}")
+                next_print += 100
+            
+            if finished == next_save:
+                name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}_ep{finished}"
+                agent.save(name)
+                next_save += save_every
+        
+        agent.last_s = None
+        agent.last_a = None
+        final_name = f"q_{self.size}x{self.size}_win{self.win_len}_{self.sym}_final"
+        agent.save(final_name)
+        
+        end = time.time()
+        self.stats['time'] = end - start
+        print(f"Обучение завершено за {self.stats['time']:.1f} сек")
+        
+        return self.stats
+    
     def get_agent(self) -> QAgent:
         return self.agent
@@ -0,0 +1,63 @@
+import numpy as np
+from typing import Dict, Optional, Tuple
+from core.batch import BoardBatch
+
+
+class VecEnv:
+    def __init__(self, n: int, size: int, win_len: int, sym: str,
+                 rews: Dict[str, float], seed: Optional[int] = None):
+        # N партий агента против случайного игрока, шаг - сразу во всех
+        self.n = n
+        self.size = size
+        self.sym = sym
+        self.agent_val = 1 if sym == 'X' else 2
+        self.opp_val = 3 - self.agent_val
+        self.rews = rews
+        self.rng = np.random.default_rng(seed)
+        self.boards = BoardBatch(n, size, win_len)
+
+    def _random_moves(self, mask: np.ndarray) -> np.ndarray:
+        # случайный свободный ход на досках из mask (-1 на остальных)
+        legal = self.boards.legal_mask()
+        keys = np.where(legal, self.rng.random(legal.shape), -1.0)
+        moves = keys.argmax(axis=1)
+        return np.where(mask & legal.any(axis=1), moves, -1)
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        # начать новые партии (все или по маске); если агент O - X ходит первым
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.boards.reset(mask)
+        if self.agent_val == 2:
+            self.boards.apply_moves(self._random_moves(mask), self.opp_val)
+        return self.boards.cells
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray,
+                                                 np.ndarray, np.ndarray]:
+        # ход агента, ответ случайного игрока, награды как в TrainManager.rews
+        # возвращает (награды, done, итог 1/-1/0, доски после шага до сброса)
+        rewards = np.full(self.n, self.rews['step'], dtype=np.float32)
+        results = np.zeros(self.n, dtype=np.int8)
+
+        self.boards.apply_moves(actions, self.agent_val)
+        won = self.boards.winners() == self.agent_val
+        draw = ~won & self.boards.is_full()
+        done = won | draw
+
+        # ответ случайного игрока там, где партия продолжается
+        self.boards.apply_moves(self._random_moves(~done), self.opp_val)
+        lost = ~done & (self.boards.winners() == self.opp_val)
+        draw |= ~done & ~lost & self.boards.is_full()
+        done = won | lost | draw
+
+        rewards[won] = self.rews['win']
+        rewards[lost] = self.rews['lose']
+        rewards[draw] = self.rews['draw']
+        results[won] = 1
+        results[lost] = -1
+
+        next_cells = self.boards.cells.copy()
+        # закончившиеся партии начинаются заново
+        if done.any():
+            self.reset(done)
+        return rewards, done, results, next_cells
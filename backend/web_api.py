@@ -10,6 +10,8 @@ from ai.mcts.mcts_agent import MCTSAgent
 
 # app = Flask(__name__)
 _cache: Dict[str, QAgent] = {}  # кеш загруженных моделей
+# форматы моделей: массив политики, замороженная, memmap, pickle
+MODEL_EXTS = ('.qpa', '.qfz', '.qtb', '.pkl')
 
 bp = Blueprint('api', __name__)
 
@@ -45,7 +47,7 @@ def prepare_models_for_web() -> bool:
         print(f"Папка не найдена: {models_dir}")
         return False
 
-    files = list(models_dir.glob("*.pkl"))
+    files = [f for ext in MODEL_EXTS for f in models_dir.glob(f"*{ext}")]
     print(f"Найдено моделей: {len(files)}")
 
     created = 0
@@ -56,11 +58,11 @@ def prepare_models_for_web() -> bool:
         if name.endswith('_final'):
             # имя без _final
             new_name = name.replace('_final', '')
-            new_path = models_dir / f"{new_name}.pkl"
+            new_path = models_dir / f"{new_name}{file.suffix}"
 
             if not new_path.exists():
                 shutil.copy2(str(file), str(new_path))
-                print(f"Создана копия: {new_name}.pkl")
+                print(f"Создана копия: {new_name}{file.suffix}")
                 created += 1
 
     print(f"Создано копий: {created}")
@@ -121,9 +123,10 @@ def ai_move() -> Tuple[Union[jsonify, Dict[str, Any]], int]:
         ]
 
         for name in names_to_try:
-            path = get_model_path(f"{name}.pkl")
-            if os.path.exists(path):
-                if agent.load(name):
+            # .qfz/.qtb только для игры и легче pickle
+            if any(os.path.exists(get_model_path(f"{name}{ext}"))
+                   for ext in MODEL_EXTS):
+                if agent.load(name, mapped=True):
                     _cache[key] = agent
                     print(f"Загружена модель: {name}")
                     break
@@ -184,13 +187,11 @@ def list_models() -> Tuple[jsonify, int]:
         wl = win_len(size)
         for symbol in ['X', 'O']:
             name = f"q_{size}x{size}_win{wl}_{symbol}"
-            path = get_model_path(f"{name}.pkl")
 
-            # проверяем обычную и финальную версии
-            has_model = os.path.exists(path)
-            if not has_model:
-                final_path = get_model_path(f"{name}_final.pkl")
-                has_model = os.path.exists(final_path)
+            # проверяем обычную и финальную версии в обоих форматах
+            has_model = any(os.path.exists(get_model_path(f"{variant}{ext}"))
+                            for variant in (name, f"{name}_final")
+                            for ext in MODEL_EXTS)
 
             models.append({
                 'size': size,
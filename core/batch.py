@@ -0,0 +1,79 @@
+import numpy as np
+from typing import List, Optional, Union
+from .board import Board
+from .lines import get_lines
+
+
+class BoardBatch:
+    def __init__(self, n: int, size: int = 3, win_len: int = 3):
+        # проверки как в Board
+        if size < 3:
+            raise ValueError("size < 3")
+        if win_len < 3 or win_len > size:
+            raise ValueError(f"win_len 3-{size}")
+
+        self.n = n
+        self.size = size
+        self.win_len = win_len
+        # N плоских досок: 0-пусто, 1-X, 2-O
+        self.cells = np.zeros((n, size * size), dtype=np.int8)
+        self.lines = get_lines(size, win_len)
+
+    @classmethod
+    def from_boards(cls, boards: List[Board]) -> 'BoardBatch':
+        # собрать батч из обычных досок одной конфигурации
+        size, win_len = boards[0].size, boards[0].win_len
+        batch = cls(len(boards), size, win_len)
+        for i, b in enumerate(boards):
+            batch.cells[i] = b.grid.ravel()
+        return batch
+
+    @property
+    def grids(self) -> np.ndarray:
+        # вид (N, size, size) без копирования
+        return self.cells.reshape(self.n, self.size, self.size)
+
+    def legal_mask(self) -> np.ndarray:
+        # (N, size*size): свободные клетки
+        return self.cells == 0
+
+    def apply_moves(self, moves: np.ndarray,
+                    vals: Union[int, np.ndarray]) -> np.ndarray:
+        # сделать по ходу на каждой доске, move < 0 - пропуск
+        moves = np.asarray(moves)
+        vals = np.broadcast_to(np.asarray(vals, dtype=np.int8), moves.shape)
+        rows = np.arange(self.n)
+        ok = moves >= 0
+        safe = np.where(ok, moves, 0)
+        ok &= self.cells[rows, safe] == 0
+        self.cells[rows[ok], safe[ok]] = vals[ok]
+        return ok
+
+    def winners(self) -> np.ndarray:
+        # (N,): 0 - нет, 1 - X, 2 - O; окна из общей таблицы линий
+        vals = self.cells[:, self.lines.windows]
+        owner = vals[:, :, 0]
+        hits = (vals == owner[:, :, None]).all(axis=2) & (owner != 0)
+        # первое окно в порядке обхода, как в Board.get_winner
+        first = hits.argmax(axis=1)
+        won = owner[np.arange(self.n), first]
+        return np.where(hits.any(axis=1), won, 0).astype(np.int8)
+
+    def is_full(self) -> np.ndarray:
+        # (N,): заполнена ли доска
+        return (self.cells != 0).all(axis=1)
+
+    def reset(self, mask: Optional[np.ndarray] = None) -> None:
+        # очистить все доски или доски по маске
+        if mask is None:
+            self.cells[:] = 0
+        else:
+            self.cells[mask] = 0
+
+    def to_board(self, i: int) -> Board:
+        # i-я доска как Board
+        b = Board(self.size, self.win_len)
+        for idx in np.flatnonzero(self.cells[i]):
+            r, c = divmod(int(idx), self.size)
+            b.move(r, c, 'X' if self.cells[i, idx] == 1 else 'O')
+        return b
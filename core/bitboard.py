@@ -0,0 +1,131 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+from .board import Board
+from .lines import get_lines
+
+
+class WinTable:
+    def __init__(self, size: int, win_len: int):
+        self.size = size
+        self.win_len = win_len
+        self.full = (1 << (size * size)) - 1
+
+        # маски всех окон из общей таблицы линий
+        lines = get_lines(size, win_len)
+        self.masks: Tuple[int, ...] = tuple(
+            sum(1 << idx for idx in line) for line in lines.lines)
+        self.cell_masks: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(self.masks[w] for w in ws) for ws in lines.cell_windows)
+
+        # направления для проверки сдвигами:
+        # (номер направления, сдвиг, маска начальных клеток, поправка к началу)
+        span = win_len - 1
+        dirs = []
+        for k, (shift, ok) in enumerate((
+            (1, lambda r, c: c + span < size),
+            (size, lambda r, c: r + span < size),
+            (size + 1, lambda r, c: r + span < size and c + span < size),
+            (size - 1, lambda r, c: r + span < size and c - span >= 0),
+        )):
+            start = 0
+            for r in range(size):
+                for c in range(size):
+                    if ok(r, c):
+                        start |= 1 << (r * size + c)
+            # для диагонали вверх обход начинается с нижней клетки
+            offset = span * (size - 1) if k == 3 else 0
+            dirs.append((k, shift, start, offset))
+        self.dirs: Tuple[Tuple[int, int, int, int], ...] = tuple(dirs)
+
+    def has_line(self, bits: int) -> bool:
+        # есть ли хоть одна линия
+        for _, shift, start, _ in self.dirs:
+            acc = bits & start
+            for i in range(1, self.win_len):
+                if not acc:
+                    break
+                acc &= bits >> (shift * i)
+            if acc:
+                return True
+        return False
+
+    def first_line(self, bits: int) -> Optional[int]:
+        # позиция первой линии в порядке обхода (или None)
+        best = None
+        for k, shift, start, offset in self.dirs:
+            acc = bits & start
+            for i in range(1, self.win_len):
+                if not acc:
+                    break
+                acc &= bits >> (shift * i)
+            if acc:
+                low = (acc & -acc).bit_length() - 1
+                pos = (low + offset) * 4 + k
+                if best is None or pos < best:
+                    best = pos
+        return best
+
+
+@lru_cache(maxsize=None)
+def get_win_table(size: int, win_len: int) -> WinTable:
+    # таблица строится один раз на конфигурацию
+    return WinTable(size, win_len)
+
+
+class BitBoard(Board):
+    def __init__(self, size: int = 3, win_len: int = 3):
+        super().__init__(size, win_len)
+        self.table = get_win_table(size, win_len)
+        # битовые маски игроков
+        self.x_bits = 0
+        self.o_bits = 0
+
+    def _set(self, r: int, c: int, val: int) -> None:
+        # поставить символ
+        super()._set(r, c, val)
+        bit = 1 << (r * self.size + c)
+        if val == 1:
+            self.x_bits |= bit
+        else:
+            self.o_bits |= bit
+
+    def _unset(self, r: int, c: int) -> None:
+        # убрать символ
+        super()._unset(r, c)
+        bit = 1 << (r * self.size + c)
+        self.x_bits &= ~bit
+        self.o_bits &= ~bit
+
+    def check_win(self, r: int, c: int) -> bool:
+        # победа через клетку (r, c)
+        idx = r * self.size + c
+        bits = self.x_bits if self.x_bits >> idx & 1 else self.o_bits
+        for m in self.table.cell_masks[idx]:
+            if (bits & m) == m:
+                return True
+        return False
+
+    def get_cell(self, r: int, c: int) -> str:
+        # вернуть символ
+        bit = 1 << (r * self.size + c)
+        if self.x_bits & bit:
+            return 'X'
+        if self.o_bits & bit:
+            return 'O'
+        return ' '
+
+    def is_valid(self, r: int, c: int) -> bool:
+        # проверить ход
+        if r < 0 or r >= self.size or c < 0 or c >= self.size:
+            return False
+        return not (self.x_bits | self.o_bits) >> (r * self.size + c) & 1
+
+    def get_winner(self) -> Optional[str]:
+        # найти победителя
+        px = self.table.first_line(self.x_bits)
+        po = self.table.first_line(self.o_bits)
+        if px is None and po is None:
+            return None
+        if po is None or (px is not None and px < po):
+            return 'X'
+        return 'O'
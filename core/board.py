@@ -1,5 +1,10 @@
 import numpy as np
 from typing import List, Tuple, Optional
+from .zobrist import get_zobrist
+from .lines import get_lines
+from .candidates import Candidates
+from .threats import ThreatIndex
+
 
 class Board:
     def __init__(self, size: int = 3, win_len: int = 3):
@@ -13,6 +18,19 @@ class Board:
         self.win_len = win_len
         # 0-пусто, 1-X, 2-O
         self.grid = np.zeros((size, size), dtype=int)
+        self.lines = get_lines(size, win_len)  # общая таблица окон
+        self.cnt = 0              # число занятых клеток
+        self.last_move: Optional[Tuple[int, int]] = None  # последний ход
+        self.winner: Optional[str] = None  # победитель по ходам через move
+        # хеш Зобриста: камни + чей ход
+        self.zobrist = get_zobrist(size)
+        self.to_move = 'X'
+        self.hash = 0
+        # стек ходов для undo: (r, c, last_move, winner, to_move)
+        self.history: List[Tuple[int, int, Optional[Tuple[int, int]],
+                                 Optional[str], str]] = []
+        self.cand: Optional[Candidates] = None  # кандидаты ходов (по запросу)
+        self.threats: Optional[ThreatIndex] = None  # угрозы по окнам (по запросу)
     
     def get_cell(self, r: int, c: int) -> str:
         # вернуть символ
@@ -29,9 +47,78 @@ class Board:
             return False
         
         val = 1 if sym == 'X' else 2
+        self.history.append((r, c, self.last_move, self.winner, self.to_move))
+        self._set(r, c, val)
+        self.cnt += 1
+        if self.cand is not None:
+            self.cand.add(r * self.size + c)
+        if self.threats is not None:
+            self.threats.add(r * self.size + c, val)
+        self.last_move = (r, c)
+        
+        # обновить хеш
+        self.hash ^= self.zobrist.cells[r * self.size + c][val]
+        nxt = 'O' if sym == 'X' else 'X'
+        if nxt != self.to_move:
+            self.hash ^= self.zobrist.side
+            self.to_move = nxt
+        
+        # проверить только линии через этот ход
+        if self.winner is None and self.check_win(r, c):
+            self.winner = sym
+        return True
+    
+    def _set(self, r: int, c: int, val: int) -> None:
+        # поставить символ
         self.grid[r, c] = val
+    
+    def _unset(self, r: int, c: int) -> None:
+        # убрать символ
+        self.grid[r, c] = 0
+    
+    def undo(self) -> bool:
+        # отменить последний ход
+        if not self.history:
+            return False
+        
+        r, c, last_move, winner, to_move = self.history.pop()
+        val = self.grid[r, c]
+        self._unset(r, c)
+        self.cnt -= 1
+        if self.cand is not None:
+            self.cand.remove(r * self.size + c)
+        if self.threats is not None:
+            self.threats.remove(r * self.size + c)
+        self.last_move = last_move
+        self.winner = winner
+        
+        # вернуть хеш
+        self.hash ^= self.zobrist.cells[r * self.size + c][val]
+        if to_move != self.to_move:
+            self.hash ^= self.zobrist.side
+            self.to_move = to_move
         return True
     
+    def track_candidates(self, radius: int = 2) -> Candidates:
+        # вести пустые клетки рядом с камнями при move/undo
+        self.cand = Candidates.from_grid(self.grid, self.size, radius)
+        return self.cand
+    
+    def track_threats(self) -> ThreatIndex:
+        # вести индекс угроз: победы и блоки за O(1)
+        self.threats = ThreatIndex.from_grid(self.grid.ravel(), self.size, self.win_len)
+        return self.threats
+    
+    def check_win(self, r: int, c: int) -> bool:
+        # победа через клетку (r, c): только окна через нее
+        return self.lines.check_cell(self.grid.ravel(), r * self.size + c)
+    
+    def zobrist_key(self, sym: Optional[str] = None) -> int:
+        # 64-битный ключ позиции, sym - кто ходит (по умолчанию to_move)
+        if sym is None or sym == self.to_move:
+            return self.hash
+        return self.hash ^ self.zobrist.side
+    
     def is_valid(self, r: int, c: int) -> bool:
         # проверить ход
         if r < 0 or r >= self.size or c < 0 or c >= self.size:
@@ -39,59 +126,13 @@ class Board:
         return self.grid[r, c] == 0
     
     def get_winner(self) -> Optional[str]:
-        # найти победителя
-        for r in range(self.size):
-            for c in range(self.size):
-                val = self.grid[r, c]
-                if val == 0:
-                    continue
-                
-                sym = 'X' if val == 1 else 'O'
-                
-                # горизонталь
-                if c + self.win_len <= self.size:
-                    win = True
-                    for i in range(self.win_len):
-                        if self.grid[r, c + i] != val:
-                            win = False
-                            break
-                    if win:
-                        return sym
-                
-                # вертикаль
-                if r + self.win_len <= self.size:
-                    win = True
-                    for i in range(self.win_len):
-                        if self.grid[r + i, c] != val:
-                            win = False
-                            break
-                    if win:
-                        return sym
-                
-                # диагональ вниз
-                if (r + self.win_len <= self.size and 
-                    c + self.win_len <= self.size):
-                    win = True
-                    for i in range(self.win_len):
-                        if self.grid[r + i, c + i] != val:
-                            win = False
-                            break
-                    if win:
-                        return sym
-                
-                # диагональ вверх
-                if (r - self.win_len + 1 >= 0 and 
-                    c + self.win_len <= self.size):
-                    win = True
-                    for i in range(self.win_len):
-                        if self.grid[r - i, c + i] != val:
-                            win = False
-                            break
-                    if win:
-                        return sym
-        
-        return None
+        # найти победителя: первое заполненное окно в порядке обхода
+        w = self.lines.first_line(self.grid.ravel())
+        if w is None:
+            return None
+        val = self.grid.flat[self.lines.lines[w][0]]
+        return 'X' if val == 1 else 'O'
     
     def is_full(self) -> bool:
         # проверить заполненность
-        return np.all(self.grid != 0)
+        return self.cnt == self.size * self.size
@@ -0,0 +1,92 @@
+import numpy as np
+from functools import lru_cache
+from typing import List, Set, Tuple
+
+
+@lru_cache(maxsize=None)
+def get_neighbors(size: int, radius: int) -> Tuple[Tuple[int, ...], ...]:
+    # клетка -> клетки в квадрате радиуса radius вокруг нее (без нее самой)
+    neigh = []
+    for idx in range(size * size):
+        r, c = divmod(idx, size)
+        neigh.append(tuple(
+            rr * size + cc
+            for rr in range(max(0, r - radius), min(size, r + radius + 1))
+            for cc in range(max(0, c - radius), min(size, c + radius + 1))
+            if (rr, cc) != (r, c)))
+    return tuple(neigh)
+
+
+def candidate_mask(flat: np.ndarray, size: int, radius: int = 2) -> np.ndarray:
+    # то же без состояния: маска пустых клеток рядом с камнями (numpy)
+    occ = np.asarray(flat).reshape(size, size) != 0
+    if not occ.any():
+        mask = np.zeros((size, size), dtype=bool)
+        mask[size // 2, size // 2] = True
+        return mask.ravel()
+    # расширение занятых клеток на radius по строкам, затем по столбцам
+    pad = np.pad(occ, radius)
+    rows = np.zeros((size + 2 * radius, size), dtype=bool)
+    for d in range(2 * radius + 1):
+        rows |= pad[:, d:d + size]
+    near = np.zeros((size, size), dtype=bool)
+    for d in range(2 * radius + 1):
+        near |= rows[d:d + size]
+    return (near & ~occ).ravel()
+
+
+class Candidates:
+    def __init__(self, size: int, radius: int = 2):
+        # пустые клетки на расстоянии <= radius от камней, обновляются
+        # при каждом ходе и отмене за O(radius^2)
+        self.size = size
+        self.radius = radius
+        self.neigh = get_neighbors(size, radius)
+        self.near = [0] * (size * size)      # камней в радиусе клетки
+        self.occ = [False] * (size * size)
+        self.stones = 0
+        self.cells: Set[int] = set()
+
+    @classmethod
+    def from_grid(cls, flat, size: int, radius: int = 2) -> 'Candidates':
+        # собрать по плоской доске (0 - пусто)
+        cand = cls(size, radius)
+        for idx in np.flatnonzero(np.asarray(flat).ravel()):
+            cand.add(int(idx))
+        return cand
+
+    def add(self, idx: int) -> None:
+        # камень поставлен в idx
+        self.occ[idx] = True
+        self.stones += 1
+        self.cells.discard(idx)
+        near = self.near
+        for j in self.neigh[idx]:
+            near[j] += 1
+            if near[j] == 1 and not self.occ[j]:
+                self.cells.add(j)
+
+    def remove(self, idx: int) -> None:
+        # камень снят с idx (обратно к add)
+        self.occ[idx] = False
+        self.stones -= 1
+        near = self.near
+        for j in self.neigh[idx]:
+            near[j] -= 1
+            if near[j] == 0:
+                self.cells.discard(j)
+        if near[idx]:
+            self.cells.add(idx)
+
+    def moves(self) -> List[int]:
+        # кандидаты по возрастанию индекса; пустая доска - центр
+        # (у любой неполной доски есть пустая клетка рядом с камнем)
+        if not self.stones:
+            return [(self.size // 2) * self.size + self.size // 2]
+        return sorted(self.cells)
+
+    def __len__(self) -> int:
+        return len(self.moves())
+
+    def __contains__(self, idx: int) -> bool:
+        return idx in self.cells
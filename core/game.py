@@ -1,4 +1,5 @@
 from .board import Board
+from .bitboard import BitBoard
 from .game_state import GameState
 from typing import Tuple, Optional
 
@@ -8,14 +9,18 @@ class Player:
 
 class Game:
     def __init__(self, size: int = 3, win_len: int = 3, 
-                 p1: str = 'human', p2: str = 'human'):
-        self.board = Board(size, win_len)
+                 p1: str = 'human', p2: str = 'human',
+                 bitboard: bool = False):
+        # bitboard=True - битовые маски вместо сетки numpy
+        board_cls = BitBoard if bitboard else Board
+        self.board = board_cls(size, win_len)
         self.players = {
             'X': Player('X'),
             'O': Player('O')
         }
         self.cur_player = self.players['X']
         self.state = GameState.PLAYING
+        self.history = []  # (игрок, состояние) до каждого хода
     
     def get_board(self) -> Board:
         # получить доску
@@ -28,9 +33,10 @@ class Game:
         
         if not self.board.move(r, c, self.cur_player.sym):
             return False
+        self.history.append((self.cur_player, self.state))
         
-        # проверить состояние
-        winner = self.board.get_winner()
+        # проверить состояние: только линии через последний ход
+        winner = self.board.winner
         if winner == 'X':
             self.state = GameState.WIN_X
         elif winner == 'O':
@@ -47,6 +53,13 @@ class Game:
         
         return True
         
+    def undo(self) -> bool:
+        # отменить последний ход
+        if not self.history or not self.board.undo():
+            return False
+        self.cur_player, self.state = self.history.pop()
+        return True
+    
     def is_game_over(self) -> bool:
         # Проверить, закончилась ли игра
         return self.state != GameState.PLAYING
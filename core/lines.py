@@ -0,0 +1,82 @@
+import numpy as np
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# направления в порядке обхода Board.get_winner
+DIRS = ((0, 1), (1, 0), (1, 1), (-1, 1))
+
+
+class LineTable:
+    def __init__(self, size: int, win_len: int):
+        self.size = size
+        self.win_len = win_len
+
+        # все выигрышные окна: начало по строкам, затем направление
+        lines = []
+        for r in range(size):
+            for c in range(size):
+                for dr, dc in DIRS:
+                    er = r + dr * (win_len - 1)
+                    ec = c + dc * (win_len - 1)
+                    if 0 <= er < size and 0 <= ec < size:
+                        lines.append(tuple((r + dr * i) * size + c + dc * i
+                                           for i in range(win_len)))
+        self.lines: Tuple[Tuple[int, ...], ...] = tuple(lines)
+        # (W, win_len) плоские индексы клеток
+        self.windows = np.array(lines, dtype=np.intp).reshape(-1, win_len)
+
+        # клетка -> окна через нее
+        cell_windows = [[] for _ in range(size * size)]
+        for w, line in enumerate(lines):
+            for idx in line:
+                cell_windows[idx].append(w)
+        self.cell_windows: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(ws) for ws in cell_windows)
+        # клетка -> (k, win_len) индексы окон через нее
+        self.cell_lines: Tuple[np.ndarray, ...] = tuple(
+            self.windows[list(ws)] for ws in cell_windows)
+
+    def first_line(self, flat: np.ndarray) -> Optional[int]:
+        # номер первого заполненного окна (или None)
+        vals = flat[self.windows]
+        owner = vals[:, 0]
+        hits = (vals == owner[:, None]).all(axis=1) & (owner != 0)
+        if not hits.any():
+            return None
+        return int(hits.argmax())
+
+    def check_cell(self, flat: np.ndarray, idx: int) -> bool:
+        # заполнено ли окно через клетку idx ее символом
+        val = flat[idx]
+        if val == 0:
+            return False
+        return bool((flat[self.cell_lines[idx]] == val).all(axis=1).any())
+
+
+@lru_cache(maxsize=None)
+def get_lines(size: int, win_len: int) -> LineTable:
+    # таблица строится один раз на конфигурацию
+    return LineTable(size, win_len)
+
+
+@lru_cache(maxsize=None)
+def get_rays(size: int, win_len: int) -> Tuple[Tuple[Tuple[Tuple[int, ...], Tuple[int, ...]], ...], ...]:
+    # клетка -> по каждому направлению два луча (вперед, назад) длиной
+    # до win_len - 1: победа - серия через клетку не короче win_len
+    rays = []
+    for idx in range(size * size):
+        r, c = divmod(idx, size)
+        cur = []
+        for dr, dc in DIRS:
+            pair = []
+            for sign in (1, -1):
+                ray = []
+                for i in range(1, win_len):
+                    rr, cc = r + sign * dr * i, c + sign * dc * i
+                    if not (0 <= rr < size and 0 <= cc < size):
+                        break
+                    ray.append(rr * size + cc)
+                pair.append(tuple(ray))
+            cur.append(tuple(pair))
+        rays.append(tuple(cur))
+    return tuple(rays)
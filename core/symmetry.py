@@ -0,0 +1,40 @@
+import numpy as np
+from functools import lru_cache
+from typing import Tuple
+
+
+class SymmetryTable:
+    def __init__(self, size: int):
+        self.size = size
+        idx = np.arange(size * size).reshape(size, size)
+        # 8 преобразований квадрата: 4 поворота и они же после отражения
+        views = []
+        for flip in (False, True):
+            base = idx[:, ::-1] if flip else idx
+            for k in range(4):
+                views.append(np.rot90(base, k))
+        # perms[t][i] - исходная клетка, которая попадает в клетку i
+        self.perms = np.array([v.ravel() for v in views], dtype=np.intp)
+        # inv[t][j] - куда попадает исходная клетка j
+        self.inv = np.argsort(self.perms, axis=1)
+
+    def canonical(self, flat: np.ndarray) -> Tuple[np.ndarray, int]:
+        # каноническая доска (минимальная по байтам) и номер преобразования
+        variants = np.asarray(flat, dtype=np.int8)[self.perms]
+        keys = [v.tobytes() for v in variants]
+        t = min(range(8), key=keys.__getitem__)
+        return variants[t], t
+
+    def to_canonical(self, t: int, idx: int) -> int:
+        # клетка исходной доски -> клетка канонической
+        return int(self.inv[t][idx])
+
+    def from_canonical(self, t: int, idx: int) -> int:
+        # клетка канонической доски -> клетка исходной
+        return int(self.perms[t][idx])
+
+
+@lru_cache(maxsize=None)
+def get_symmetry(size: int) -> SymmetryTable:
+    # таблицы перестановок строятся один раз на размер
+    return SymmetryTable(size)
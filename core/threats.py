@@ -0,0 +1,117 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from .lines import get_lines
+
+
+@lru_cache(maxsize=None)
+def get_ends(size: int, win_len: int) -> Tuple[Tuple[Tuple[int, ...], ...],
+                                               Tuple[Tuple[int, ...], ...]]:
+    # концы окон: клетки сразу до и после окна на его линии (если на доске)
+    # и обратная таблица: клетка -> окна, для которых она конец
+    lines = get_lines(size, win_len).lines
+    ends = []
+    cell_ends: List[List[int]] = [[] for _ in range(size * size)]
+    for w, line in enumerate(lines):
+        r0, c0 = divmod(line[0], size)
+        r1, c1 = divmod(line[1], size)
+        rl, cl = divmod(line[-1], size)
+        dr, dc = r1 - r0, c1 - c0
+        cur = []
+        for r, c in ((r0 - dr, c0 - dc), (rl + dr, cl + dc)):
+            if 0 <= r < size and 0 <= c < size:
+                cur.append(r * size + c)
+                cell_ends[r * size + c].append(w)
+        ends.append(tuple(cur))
+    return tuple(ends), tuple(tuple(ws) for ws in cell_ends)
+
+
+class ThreatIndex:
+    def __init__(self, size: int, win_len: int):
+        # счетчики окон по игрокам: сколько камней и открыто ли окно;
+        # ход и отмена меняют только окна через клетку и окна с концом в ней
+        self.size = size
+        self.win_len = win_len
+        table = get_lines(size, win_len)
+        self.lines = table.lines
+        self.cell_windows = table.cell_windows
+        self.ends, self.cell_ends = get_ends(size, win_len)
+        self.cells = [0] * (size * size)  # 0 - пусто, 1 - X, 2 - O
+        # cnt[w][p] - камней игрока p в окне w
+        self.cnt = [[0, 0, 0] for _ in self.lines]
+        # hist[p][k][open] - окон только с k камнями p (open: оба конца пусты)
+        self.hist = [[[0, 0] for _ in range(win_len + 1)] for _ in range(3)]
+        # клетка -> число окон, которые она завершает (для игрока p)
+        self.win_cells: List[Dict[int, int]] = [{}, {}, {}]
+
+    @classmethod
+    def from_grid(cls, flat, size: int, win_len: int) -> 'ThreatIndex':
+        # собрать по плоской доске (0 - пусто, 1 - X, 2 - O)
+        index = cls(size, win_len)
+        for idx, val in enumerate(list(flat)):
+            if val:
+                index.add(idx, int(val))
+        return index
+
+    def _is_open(self, w: int) -> int:
+        ends = self.ends[w]
+        return int(len(ends) == 2 and not self.cells[ends[0]] and not self.cells[ends[1]])
+
+    def _count(self, w: int, sign: int) -> None:
+        # учесть (+1) или снять (-1) вклад окна w в счетчики
+        cnt = self.cnt[w]
+        for p in (1, 2):
+            k = cnt[p]
+            if not k or cnt[3 - p]:
+                continue
+            self.hist[p][k][self._is_open(w)] += sign
+            if k == self.win_len - 1:
+                # единственная пустая клетка окна - победный ход p
+                cell = next(c for c in self.lines[w] if not self.cells[c])
+                wins = self.win_cells[p]
+                wins[cell] = wins.get(cell, 0) + sign
+                if not wins[cell]:
+                    del wins[cell]
+
+    def _update(self, idx: int, val: int) -> None:
+        # поставить (val > 0) или снять (val = 0) камень в idx
+        affected = self.cell_windows[idx] + self.cell_ends[idx]
+        for w in affected:
+            self._count(w, -1)
+        old = self.cells[idx]
+        self.cells[idx] = val
+        for w in self.cell_windows[idx]:
+            if val:
+                self.cnt[w][val] += 1
+            else:
+                self.cnt[w][old] -= 1
+        for w in affected:
+            self._count(w, 1)
+
+    def add(self, idx: int, val: int) -> None:
+        # камень val (1 - X, 2 - O) поставлен в idx
+        self._update(idx, val)
+
+    def remove(self, idx: int) -> None:
+        # камень снят с idx
+        self._update(idx, 0)
+
+    def count(self, p: int, k: int, open_only: bool = False) -> int:
+        # окна только с k камнями игрока p (open_only - с пустыми концами)
+        opened = self.hist[p][k][1]
+        return opened if open_only else opened + self.hist[p][k][0]
+
+    def wins(self, p: int) -> List[int]:
+        # клетки, где ход p сразу выигрывает
+        return list(self.win_cells[p])
+
+    def blocks(self, p: int) -> List[int]:
+        # клетки, которые p обязан закрыть (выигрыши соперника)
+        return list(self.win_cells[3 - p])
+
+    def forced(self, p: int) -> Optional[List[int]]:
+        # вынужденные ходы p: свои победы, иначе блоки; None - нет
+        return self.wins(p) or self.blocks(p) or None
+
+    def double_threat(self, p: int) -> bool:
+        # у p две и больше клеток для победы - один блок не спасает
+        return len(self.win_cells[p]) >= 2
@@ -0,0 +1,31 @@
+import random
+from functools import lru_cache
+from typing import Tuple
+
+
+class ZobristTable:
+    def __init__(self, size: int, seed: int = 20240601):
+        # фиксированный seed: ключи совпадают между процессами и запусками
+        rnd = random.Random(seed * 100 + size)
+        # cells[idx][val]: val 1-X, 2-O (0 - пусто, ключ 0)
+        self.cells: Tuple[Tuple[int, int, int], ...] = tuple(
+            (0, rnd.getrandbits(64), rnd.getrandbits(64))
+            for _ in range(size * size)
+        )
+        self.side = rnd.getrandbits(64)  # ход O
+
+    def hash_grid(self, flat, to_move: int = 1) -> int:
+        # полный хеш плоской доски (значения 0/1/2)
+        h = 0
+        for idx, val in enumerate(flat):
+            if val:
+                h ^= self.cells[idx][val]
+        if to_move == 2:
+            h ^= self.side
+        return h
+
+
+@lru_cache(maxsize=None)
+def get_zobrist(size: int) -> ZobristTable:
+    # одна таблица на размер доски
+    return ZobristTable(size)
@@ -0,0 +1,124 @@
+import pytest
+import numpy as np
+import random
+import time
+from pathlib import Path
+import sys
+
+# путь к проекту
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root))
+
+from ai.alphabeta import AlphaBetaAgent, TransTable
+from ai.alphabeta.trans_table import EXACT, LOWER
+from core.board import Board
+
+
+def make_board(size, win_len, moves):
+    b = Board(size, win_len)
+    for r, c, s in moves:
+        b.move(r, c, s)
+    return b
+
+
+class TestAlphaBeta:
+    @pytest.mark.parametrize("size,win_len", [(3, 3), (7, 5), (15, 5)])
+    def test_empty_board(self, size, win_len):
+        # ход на пустой доске
+        ag = AlphaBetaAgent(size, win_len, 'X', time_limit=0.2)
+        info = ag.get_move(Board(size, win_len), 'X')
+        assert 0 <= info['r'] < size and 0 <= info['c'] < size
+        assert info['action'] == (info['row'], info['col'])
+    
+    def test_take_win(self):
+        # своя победа важнее блока
+        b = make_board(7, 5, [(3, 1, 'X'), (0, 0, 'O'), (3, 2, 'X'), (0, 1, 'O'),
+                              (3, 3, 'X'), (0, 2, 'O'), (3, 4, 'X'), (0, 3, 'O')])
+        info = AlphaBetaAgent(7, 5, 'X', time_limit=0.5).get_move(b, 'X')
+        assert (info['r'], info['c']) in [(3, 0), (3, 5)]
+        assert info['conf'] == 1.0
+    
+    def test_block(self):
+        # блок четверки на 15x15
+        b = make_board(15, 5, [(7, 7, 'X'), (7, 8, 'O'), (8, 8, 'X'), (6, 6, 'O'),
+                               (9, 9, 'X'), (5, 5, 'O'), (10, 10, 'X')])
+        start = time.time()
+        info = AlphaBetaAgent(15, 5, 'O', time_limit=0.5).get_move(b, 'O')
+        assert (info['r'], info['c']) == (11, 11)
+        assert time.time() - start < 1.5
+    
+    def test_board_unchanged(self):
+        # поиск не меняет доску игры
+        b = make_board(5, 4, [(2, 2, 'X'), (1, 1, 'O')])
+        grid, key = b.grid.copy(), b.hash
+        AlphaBetaAgent(5, 4, 'X', time_limit=0.1).get_move(b, 'X')
+        assert (b.grid == grid).all() and b.hash == key and b.cnt == 2
+    
+    def test_3x3_never_loses(self):
+        # полный перебор 3x3: не проигрывает случайному игроку
+        rng = random.Random(0)
+        for g in range(10):
+            me = 'X' if g % 2 else 'O'
+            ag = AlphaBetaAgent(3, 3, me, time_limit=1.0)
+            b = Board(3, 3)
+            cur = 'X'
+            while b.winner is None and not b.is_full():
+                if cur == me:
+                    info = ag.get_move(b, cur)
+                    r, c = info['r'], info['c']
+                else:
+                    r, c = rng.choice([(r, c) for r in range(3) for c in range(3)
+                                       if b.grid[r, c] == 0])
+                b.move(r, c, cur)
+                cur = 'O' if cur == 'X' else 'X'
+            assert b.winner in (None, me)
+    
+    def test_trans_table_replace(self):
+        # замена: глубже или новый поиск вытесняют запись
+        tt = TransTable(bits=2)
+        tt.put(1, 5, 10, EXACT, 3)
+        tt.put(5, 2, 20, LOWER, 4)  # тот же слот, мельче - не заменяет
+        assert tt.get(1)[2] == 10 and tt.get(5) is None
+        tt.put(5, 6, 20, LOWER, 4)
+        assert tt.get(5)[2] == 20 and tt.get(1) is None
+        tt.new_search()
+        tt.put(1, 1, 30, EXACT, 0)  # запись старого поиска
+        assert tt.get(1)[2] == 30
+        assert len(tt) == 1
+    
+    def test_candidates(self):
+        # с кандидатами тот же блок, но узлов на порядок меньше
+        b = make_board(9, 5, [(4, 4, 'X'), (4, 5, 'O'), (5, 5, 'X'), (3, 3, 'O'),
+                              (6, 6, 'X'), (2, 2, 'O'), (7, 7, 'X')])
+        full = AlphaBetaAgent(9, 5, 'O', time_limit=30, max_depth=2)
+        near = AlphaBetaAgent(9, 5, 'O', time_limit=30, max_depth=2, radius=1)
+        assert full.get_move(b, 'O')['action'] == (8, 8)
+        assert near.get_move(b, 'O')['action'] == (8, 8)
+        # блок вынужденный (индекс угроз), узлы сравниваются в тихой позиции
+        b = make_board(9, 5, [(4, 4, 'X'), (4, 5, 'O'), (5, 5, 'X')])
+        full.get_move(b, 'O')
+        r, c = near.get_move(b, 'O')['action']
+        assert b.grid[r, c] == 0 and np.abs(b.grid[max(0, r - 1):r + 2, max(0, c - 1):c + 2]).sum()
+        assert near.nodes * 2 < full.nodes
+    
+    def test_candidates_stale_moves(self):
+        # ход из таблицы и киллер вне кандидатов не продвигаются
+        b = make_board(9, 5, [(4, 4, 'X')])
+        b.track_candidates(1)
+        ag = AlphaBetaAgent(9, 5, 'O', radius=1)
+        ag.killers = [[80, 41]]
+        moves = ag._order(b, 2, 0, 0)
+        assert sorted(moves) == sorted(b.cand.moves()) and moves[0] == 41
+        # партия на 15x15 со случайным соперником доигрывается
+        rng = random.Random(0)
+        ag = AlphaBetaAgent(15, 5, 'X', time_limit=0.05, max_depth=2, radius=1)
+        b = Board(15, 5)
+        cur = 'X'
+        while b.get_winner() is None and not b.is_full() and b.cnt < 30:
+            if cur == 'X':
+                r, c = ag.get_move(b, cur)['action']
+            else:
+                r, c = rng.choice([(r, c) for r in range(15) for c in range(15)
+                                   if b.grid[r, c] == 0])
+            b.move(r, c, cur)
+            cur = 'O' if cur == 'X' else 'X'
@@ -24,8 +24,8 @@ class MockQAgent:
         self.symbol = symbol
         print(f"MockQAgent создан: size={size}, win_len={win_len}, symbol={symbol}")
 
-    def load(self, name):
-        print(f"MockQAgent.load вызван с: {name}")
+    def load(self, name, mapped=False):
+        print(f"MockQAgent.load вызван с: {name}, mapped={mapped}")
         return True
 
     def get_move(self, board, symbol):
@@ -0,0 +1,321 @@
+import pytest
+import random
+from pathlib import Path
+import sys
+root = Path(__file__).parent.parent
+sys.path.insert(0, str(root))
+from core.board import Board
+from core.bitboard import BitBoard, get_win_table
+from core.game import Game
+from core.game_state import GameState
+from core.batch import BoardBatch
+from core.lines import get_lines
+from core.symmetry import get_symmetry
+from core.candidates import Candidates, candidate_mask
+from core.threats import ThreatIndex
+import numpy as np
+
+
+def random_fill(boards, size, cnt, seed):
+    # одинаково заполнить несколько досок
+    rnd = random.Random(seed)
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    rnd.shuffle(cells)
+    for i, (r, c) in enumerate(cells[:cnt]):
+        sym = 'X' if rnd.random() < 0.5 else 'O'
+        for b in boards:
+            b.move(r, c, sym)
+
+
+class TestBitBoard:
+    @pytest.mark.parametrize("size,win_len", [
+        (3, 3),
+        (4, 4),
+        (5, 4),
+        (8, 5),
+        (15, 5),
+    ])
+    def test_same_as_board(self, size, win_len):
+        # битовая доска совпадает с обычной
+        for seed in range(30):
+            b = Board(size, win_len)
+            bb = BitBoard(size, win_len)
+            random_fill([b, bb], size, (seed * 7) % (size * size + 1), seed)
+
+            assert bb.get_winner() == b.get_winner()
+            assert bb.is_full() == b.is_full()
+            for r in range(size):
+                for c in range(size):
+                    assert bb.get_cell(r, c) == b.get_cell(r, c)
+                    assert bb.is_valid(r, c) == b.is_valid(r, c)
+            assert not bb.is_valid(-1, 0)
+            assert not bb.is_valid(0, size)
+
+    def test_masks(self):
+        # 3x3: 8 линий
+        t = get_win_table(3, 3)
+        assert len(t.masks) == 8
+        assert get_win_table(3, 3) is t
+
+    def test_game(self):
+        # игра на битовой доске
+        g = Game(3, 3, bitboard=True)
+        assert isinstance(g.get_board(), BitBoard)
+        for r, c in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+            assert g.move(r, c)
+        assert g.state == GameState.WIN_X
+        assert not g.move(2, 2)
+
+
+class TestLastMove:
+    @pytest.mark.parametrize("bitboard", [False, True])
+    @pytest.mark.parametrize("size,win_len", [
+        (3, 3),
+        (5, 4),
+        (8, 5),
+    ])
+    def test_winner_by_last_move(self, size, win_len, bitboard):
+        # победитель по последнему ходу совпадает с полным обходом
+        rnd = random.Random(size)
+        for _ in range(20):
+            g = Game(size, win_len, bitboard=bitboard)
+            b = g.get_board()
+            while not g.is_game_over():
+                moves = [(r, c) for r in range(size) for c in range(size)
+                         if b.is_valid(r, c)]
+                r, c = rnd.choice(moves)
+                assert g.move(r, c)
+                assert b.last_move == (r, c)
+                assert b.winner == b.get_winner()
+            if g.state == GameState.DRAW:
+                assert b.is_full()
+
+
+class TestZobrist:
+    def test_order_independent(self):
+        # одна позиция разными порядками ходов - один хеш
+        b1 = Board(5, 4)
+        b2 = Board(5, 4)
+        for r, c, s in [(0, 0, 'X'), (1, 1, 'O'), (2, 2, 'X'), (3, 3, 'O')]:
+            b1.move(r, c, s)
+        for r, c, s in [(2, 2, 'X'), (3, 3, 'O'), (0, 0, 'X'), (1, 1, 'O')]:
+            b2.move(r, c, s)
+        assert b1.hash == b2.hash
+        assert b1.zobrist_key('X') == b2.zobrist_key('X')
+
+    def test_side_to_move(self):
+        # сторона хода входит в ключ
+        b = Board(3, 3)
+        b.move(1, 1, 'X')
+        assert b.to_move == 'O'
+        assert b.zobrist_key('O') == b.hash
+        assert b.zobrist_key('X') != b.zobrist_key('O')
+        flat = b.grid.ravel().tolist()
+        assert b.zobrist.hash_grid(flat, to_move=2) == b.hash
+
+
+class TestUndo:
+    @pytest.mark.parametrize("bitboard", [False, True])
+    def test_board_undo(self, bitboard):
+        # undo возвращает доску, хеш и победителя
+        b = BitBoard(4, 3) if bitboard else Board(4, 3)
+        snaps = []
+        for r, c, s in [(0, 0, 'X'), (1, 0, 'O'), (0, 1, 'X'),
+                        (1, 1, 'O'), (0, 2, 'X'), (3, 3, 'O')]:
+            snaps.append((b.grid.copy(), b.hash, b.winner, b.last_move,
+                          b.to_move, b.cnt))
+            assert b.move(r, c, s)
+        assert b.winner == 'X'
+        
+        while snaps:
+            grid, h, winner, last, to_move, cnt = snaps.pop()
+            assert b.undo()
+            assert (b.grid == grid).all()
+            assert (b.hash, b.winner, b.last_move, b.to_move, b.cnt) == \
+                (h, winner, last, to_move, cnt)
+        assert not b.undo()
+        assert b.get_cell(0, 0) == ' '
+        assert b.is_valid(0, 0)
+
+    def test_game_undo(self):
+        # undo в игре возвращает игрока и состояние
+        g = Game(3, 3)
+        for r, c in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+            g.move(r, c)
+        assert g.state == GameState.WIN_X
+        assert g.undo()
+        assert g.state == GameState.PLAYING
+        assert g.cur_player.sym == 'X'
+        assert g.move(2, 2)
+        assert g.cur_player.sym == 'O'
+        
+        while g.undo():
+            pass
+        assert g.cur_player.sym == 'X'
+        assert g.board.cnt == 0
+
+
+class TestBoardBatch:
+    @pytest.mark.parametrize("size,win_len", [
+        (3, 3),
+        (5, 4),
+        (8, 5),
+    ])
+    def test_random_games(self, size, win_len):
+        # батч совпадает с Board на случайных партиях
+        n = 64
+        rng = np.random.default_rng(size)
+        batch = BoardBatch(n, size, win_len)
+        boards = [Board(size, win_len) for _ in range(n)]
+        player = 1
+        for _ in range(size * size):
+            legal = batch.legal_mask()
+            done = (batch.winners() != 0) | batch.is_full()
+            keys = np.where(legal, rng.random(legal.shape), -1.0)
+            moves = np.where(done, -1, keys.argmax(axis=1))
+            ok = batch.apply_moves(moves, player)
+            assert (ok == ~done).all()
+            for i in np.flatnonzero(ok):
+                r, c = divmod(int(moves[i]), size)
+                boards[i].move(r, c, 'X' if player == 1 else 'O')
+            player = 3 - player
+        
+        sym = {0: None, 1: 'X', 2: 'O'}
+        for i, b in enumerate(boards):
+            assert sym[int(batch.winners()[i])] == b.get_winner()
+            assert batch.is_full()[i] == b.is_full()
+            assert (batch.grids[i] == b.grid).all()
+
+    def test_from_boards(self):
+        # сборка из досок и обратно
+        b = Board(3, 3)
+        b.move(1, 1, 'X')
+        batch = BoardBatch.from_boards([b, Board(3, 3)])
+        assert batch.legal_mask().sum() == 17
+        assert batch.to_board(0).get_cell(1, 1) == 'X'
+        batch.reset(np.array([True, False]))
+        assert batch.legal_mask().all()
+
+
+class TestLines:
+    @pytest.mark.parametrize("size,win_len,count", [
+        (3, 3, 8),
+        (4, 4, 10),
+        (5, 4, 28),
+        (15, 5, 572),
+    ])
+    def test_windows(self, size, win_len, count):
+        # число окон и карта клетка -> окна
+        t = get_lines(size, win_len)
+        assert t.windows.shape == (count, win_len)
+        assert get_lines(size, win_len) is t
+        for idx, ws in enumerate(t.cell_windows):
+            for w in ws:
+                assert idx in t.lines[w]
+        assert sum(len(ws) for ws in t.cell_windows) == count * win_len
+
+    def test_check_cell(self):
+        # проверка окон через клетку
+        b = Board(5, 4)
+        for c in range(4):
+            b.move(2, c, 'O')
+        t = get_lines(5, 4)
+        flat = b.grid.ravel()
+        assert t.check_cell(flat, 2 * 5 + 3)
+        assert not t.check_cell(flat, 2 * 5 + 4)
+        assert t.first_line(flat) is not None
+
+
+class TestSymmetry:
+    @pytest.mark.parametrize("size", [3, 4, 5])
+    def test_canonical(self, size):
+        # все 8 вариантов дают одну каноническую доску
+        sym = get_symmetry(size)
+        assert (sym.perms[0] == np.arange(size * size)).all()
+        rng = np.random.default_rng(size)
+        flat = rng.integers(0, 3, size * size)
+        canon, t = sym.canonical(flat)
+        for k in range(8):
+            other, t2 = sym.canonical(flat[sym.perms[k]])
+            assert (other == canon).all()
+        
+        # ходы переводятся туда и обратно
+        for idx in range(size * size):
+            c = sym.to_canonical(t, idx)
+            assert canon[c] == flat[idx]
+            assert sym.from_canonical(t, c) == idx
+
+
+class TestCandidates:
+    @pytest.mark.parametrize("size,radius", [(5, 1), (9, 2), (15, 2)])
+    def test_incremental(self, size, radius):
+        # ход/отмена на доске = пересчет маски с нуля
+        b = Board(size, min(5, size))
+        cand = b.track_candidates(radius)
+        assert cand.moves() == [(size // 2) * size + size // 2]
+        rnd = random.Random(size)
+        for _ in range(200):
+            empty = [(r, c) for r in range(size) for c in range(size) if b.grid[r, c] == 0]
+            if b.cnt and (not empty or rnd.random() < 0.3):
+                b.undo()
+            else:
+                b.move(*rnd.choice(empty), rnd.choice('XO'))
+            mask = candidate_mask(b.grid.ravel(), size, radius)
+            assert cand.moves() == np.flatnonzero(mask).tolist()
+
+    def test_branching(self):
+        # на 15x15 рядом с парой камней - малая часть доски
+        b = Board(15, 5)
+        b.move(7, 7, 'X')
+        b.move(7, 8, 'O')
+        cand = b.track_candidates(2)
+        assert len(cand) == 5 * 6 - 2
+        assert 7 * 15 + 7 not in cand
+
+    def test_from_grid(self):
+        # сборка по готовой доске, полная доска - нет ходов
+        flat = np.array([1, 2, 1, 2, 1, 2, 2, 1, 0])
+        assert Candidates.from_grid(flat, 3, 1).moves() == [8]
+        flat[8] = 1
+        assert Candidates.from_grid(flat, 3, 1).moves() == []
+
+
+class TestThreats:
+    @pytest.mark.parametrize("size,win_len", [(3, 3), (7, 4), (10, 5)])
+    def test_incremental(self, size, win_len):
+        # ход/отмена на доске = сборка индекса с нуля
+        b = Board(size, win_len)
+        threats = b.track_threats()
+        rnd = random.Random(size)
+        for _ in range(300):
+            empty = [(r, c) for r in range(size) for c in range(size) if b.grid[r, c] == 0]
+            if b.cnt and (not empty or rnd.random() < 0.3):
+                b.undo()
+            else:
+                b.move(*rnd.choice(empty), rnd.choice('XO'))
+            fresh = ThreatIndex.from_grid(b.grid.ravel(), size, win_len)
+            assert threats.hist == fresh.hist
+            assert threats.win_cells == fresh.win_cells
+            # победная клетка и правда выигрывает
+            for p, sym in ((1, 'X'), (2, 'O')):
+                for idx in threats.wins(p):
+                    if b.winner is None:
+                        b.move(idx // size, idx % size, sym)
+                        assert b.winner == sym
+                        b.undo()
+    
+    def test_counts(self):
+        # открытая тройка X на 9x9, O закрывает один конец
+        b = Board(9, 4)
+        threats = b.track_threats()
+        for c in (3, 4, 5):
+            b.move(4, c, 'X')
+        assert sorted(threats.wins(1)) == [4 * 9 + 2, 4 * 9 + 6]
+        assert threats.blocks(2) == threats.wins(1)
+        assert threats.double_threat(1)
+        assert threats.count(1, 3, open_only=True) == 2
+        b.move(4, 2, 'O')
+        assert threats.wins(1) == [4 * 9 + 6]
+        assert threats.forced(2) == [4 * 9 + 6]
+        assert threats.count(1, 3, open_only=True) == 0
+        assert threats.count(1, 3) == 1
@@ -10,6 +10,7 @@ root = Path(__file__).parent.parent
 sys.path.insert(0, str(root))
 
 from ai.mcts.mcts_agent import MCTSAgent
+from core.candidates import Candidates
 from core.board import Board
 
 class TestMCTS:
@@ -299,3 +300,203 @@ class TestMCTS:
         
         # время не слишком большое
         assert t2 - t1 < 10.0
+
+    @pytest.mark.parametrize("size,win_len", [
+        (3, 3),
+        (5, 4),
+    ])
+    def test_mcts_symmetric(self, size, win_len):
+        # симметричный режим ниже корня: у позиции без симметрий корень
+        # тот же, но равные позиции в глубине - один узел
+        b = Board(size=size, win_len=win_len)
+        b.move(0, 0, 'X')
+        b.move(0, 1, 'O')
+        
+        random.seed(1)
+        plain = MCTSAgent(size=size, win_len=win_len, sym='O', sims=200)
+        plain.get_move(b, 'O')
+        random.seed(1)
+        ag = MCTSAgent(size=size, win_len=win_len, sym='O', sims=200,
+                       symmetric=True)
+        m = ag.get_move(b, 'O')
+        
+        assert b.is_valid(m['row'], m['col'])
+        assert len(ag.tree.moves(next(iter(ag.tree.nodes.values())))) == size * size - 2
+        assert len(ag.tree) < len(plain.tree)
+    
+    def test_mcts_transpositions(self):
+        # позиция, пришедшая разными порядками ходов, раскрыта один раз
+        random.seed(2)
+        ag = MCTSAgent(3, 3, 'X', sims=2000)
+        assert ag.get_move(Board(3, 3), 'X')['action'] is not None
+        tree = ag.tree
+        first = tree.first[:len(tree)]
+        expanded = first[first >= 0]
+        assert len(set(expanded.tolist())) == len(tree.nodes) < len(expanded)
+    
+    def test_mcts_candidates(self):
+        # на 15x15 ходы только рядом с камнями
+        b = Board(15, 5)
+        b.move(7, 7, 'X')
+        ag = MCTSAgent(15, 5, 'O', sims=200, radius=1)
+        info = ag.get_move(b, 'O')
+        assert max(abs(info['row'] - 7), abs(info['col'] - 7)) == 1
+        assert ag.cand is None
+        root = next(iter(ag.tree.nodes.values()))
+        assert len(ag.tree.moves(root)) == 8
+    
+    def test_mcts_array_tree(self):
+        # дерево в массивах: дети подряд, посещения корня = сумма по детям
+        random.seed(3)
+        b = Board(5, 4)
+        ag = MCTSAgent(5, 4, 'X', sims=300)
+        ag.get_move(b, 'X')
+        root = next(iter(ag.tree.nodes.values()))
+        kids = ag.tree.children(root)
+        assert len(kids) == 25
+        assert sorted(ag.tree.moves(root).tolist()) == list(range(25))
+        assert ag.tree.visits[root] == ag.tree.visits[kids.start:kids.stop].sum() == 300
+        assert ag.tree.nbytes() == len(ag.tree) * 20
+    
+    def test_mcts_symmetric_root(self):
+        # пустая 3x3: у корня три хода (угол, край, центр)
+        ag = MCTSAgent(3, 3, 'X', sims=50, symmetric=True)
+        m = ag.get_move(Board(3, 3), 'X')
+        root = next(iter(ag.tree.nodes.values()))
+        assert len(ag.tree.moves(root)) == 3
+        assert Board(3, 3).is_valid(m['row'], m['col'])
+    
+    @pytest.mark.parametrize("size,radius", [(6, 1), (6, 2), (8, 1), (8, 2)])
+    def test_mcts_symmetric_candidates(self, size, radius):
+        # четная пустая доска: единственный кандидат не в центре симметрий,
+        # класс хода берется среди кандидатов - корень не пустой
+        ag = MCTSAgent(size, 5, 'X', sims=50, symmetric=True, radius=radius, seed=1)
+        m = ag.get_move(Board(size, 5), 'X')
+        assert m['action'] is not None
+        root = next(iter(ag.tree.nodes.values()))
+        assert len(ag.tree.moves(root)) == 1
+    
+    def test_mcts_takes_win(self):
+        # выигрыш в один ход находится
+        random.seed(5)
+        b = Board(3, 3)
+        for r, c, sym in ((0, 0, 'X'), (1, 1, 'O'), (0, 1, 'X'), (2, 2, 'O')):
+            b.move(r, c, sym)
+        ag = MCTSAgent(3, 3, 'X', sims=300)
+        assert ag.get_move(b, 'X')['action'] == (0, 2)
+    
+    def test_mcts_seed(self):
+        # с seed поиск повторяется: тот же ход и та же статистика корня
+        b = Board(7, 5)
+        b.move(3, 3, 'X')
+        res = []
+        for _ in range(2):
+            ag = MCTSAgent(7, 5, 'O', sims=200, seed=11)
+            m = ag.get_move(b, 'O')
+            root = next(iter(ag.tree.nodes.values()))
+            kids = ag.tree.children(root)
+            res.append((m['action'], ag.tree.visits[kids.start:kids.stop].tolist()))
+        assert res[0] == res[1]
+    
+    def test_mcts_select_ties(self):
+        # равные UCT: выбор всегда среди лучших и повторяется при том же seed
+        picks = []
+        for _ in range(2):
+            ag = MCTSAgent(5, 4, 'X', seed=2)
+            tree = ag.tree
+            root = tree.root(0)
+            tree.expand(root, np.arange(6))
+            kids = tree.children(root)
+            tree.visits[kids.start:kids.stop] = 3
+            tree.wins[kids.start:kids.stop] = [1, 2, 1, 2, 1, 2]
+            tree.visits[root] = 18
+            picks.append([ag._select(tree, kids) - kids.start for _ in range(30)])
+        assert set(picks[0]) == {1, 3, 5}
+        assert picks[0] == picks[1]
+    
+    def test_rollout_stats(self):
+        # случайная партия 3x3: X ~58.5%, O ~28.8%, ничья ~12.7%
+        ag = MCTSAgent(3, 3, 'X', seed=4)
+        arr = np.zeros((3, 3), dtype=int)
+        res = np.array([ag._simulate_random(arr, 1) for _ in range(4000)])
+        assert abs((res == 1).mean() - 0.585) < 0.03
+        assert abs((res == -1).mean() - 0.288) < 0.03
+        assert not arr.any()
+    
+    def test_rollout_last_move(self):
+        # единственный ход собирает линию / дает ничью
+        arr = np.array([[1, 1, 0], [2, 2, 1], [1, 2, 2]])
+        ag = MCTSAgent(3, 3, 'X', seed=0)
+        assert ag._simulate_random(arr, 1) == 1
+        assert ag._simulate_random(arr, 2) == 0
+        # 9x9 без собранных линий, O замыкает серию с двух сторон от хода
+        r, c = np.indices((9, 9))
+        arr = 1 + (c + 2 * r) // 2 % 2
+        arr[4, [2, 3, 5, 6]] = 2
+        arr[4, 4] = 0
+        ag = MCTSAgent(9, 5, 'O', seed=0)
+        assert ag.lines.first_line(arr.ravel()) is None
+        assert ag._simulate_random(arr, 2) == -1
+        assert ag._simulate_random(arr, 1) == 0
+    
+    def test_rollout_candidates(self):
+        # с кандидатами доска и кандидаты после симуляции прежние
+        b = Board(9, 5)
+        b.move(4, 4, 'X')
+        ag = MCTSAgent(9, 5, 'O', radius=1, seed=1)
+        arr = ag._board_to_arr(b, 'O')
+        ag.cand = Candidates.from_grid(arr, 9, 1)
+        before = ag.cand.moves()
+        for _ in range(20):
+            assert ag._simulate_random(arr, 1) in (-1, 0, 1)
+        assert ag.cand.moves() == before and ag.cand.stones == 1
+    
+    def test_rollout_batch(self):
+        # k партий за проход: те же доли, что у одиночных симуляций
+        ag = MCTSAgent(3, 3, 'X', seed=6)
+        arr = np.zeros((3, 3), dtype=int)
+        x, o = ag._simulate_batch(arr, 1, 4000)
+        assert abs(x - 0.585) < 0.03 and abs(o - 0.288) < 0.03
+        # один ход до конца: победа или ничья в каждой партии
+        arr = np.array([[1, 1, 0], [2, 2, 1], [1, 2, 2]])
+        assert ag._simulate_batch(arr, 1, 8) == (1.0, 0.0)
+        assert ag._simulate_batch(arr, 2, 8) == (0.0, 0.0)
+        # первым собирается окно, последняя клетка которого раньше
+        r, c = np.indices((9, 9))
+        arr = 1 + (c + 2 * r) // 2 % 2
+        arr[4, [2, 3, 5, 6]] = 2
+        arr[4, 4] = arr[0, 0] = 0
+        x, o = MCTSAgent(9, 5, 'O', seed=1)._simulate_batch(arr, 2, 200)
+        assert x == 0.0 and 0.3 < o < 0.7
+    
+    def test_mcts_batch(self):
+        # лист-параллельный режим: выигрыш в один ход, доли в дереве
+        b = Board(3, 3)
+        for r, c, sym in ((0, 0, 'X'), (1, 1, 'O'), (0, 1, 'X'), (2, 2, 'O')):
+            b.move(r, c, sym)
+        ag = MCTSAgent(3, 3, 'X', sims=200, seed=3, batch=16)
+        assert ag.get_move(b, 'X')['action'] == (0, 2)
+        tree = ag.tree
+        root = next(iter(tree.nodes.values()))
+        kids = tree.children(root)
+        wins = tree.wins[kids.start:kids.stop]
+        assert (wins <= tree.visits[kids.start:kids.stop]).all()
+        assert (wins != np.round(wins)).any()
+    
+    def test_mcts_workers(self):
+        # корневой параллелизм: пул живет между ходами, статистика сложена
+        from ai.mcts.mcts_agent import get_pool
+        b = Board(3, 3)
+        for r, c, sym in ((0, 0, 'X'), (1, 1, 'O'), (0, 1, 'X'), (2, 2, 'O')):
+            b.move(r, c, sym)
+        ag = MCTSAgent(3, 3, 'X', sims=300, seed=2, workers=2)
+        assert ag.get_move(b, 'X')['action'] == (0, 2)
+        pool = get_pool(2)
+        moves, visits, wins = ag._search_parallel(ag._board_to_arr(b, 'X'))
+        assert get_pool(2) is pool
+        assert sorted(moves.tolist()) == [2, 3, 5, 6, 7]
+        assert visits.sum() == 300 and (wins <= visits).all()
+        # тот же seed - тот же результат
+        again = MCTSAgent(3, 3, 'X', sims=300, seed=2, workers=2)
+        again.get_move(b, 'X')
+        assert np.array_equal(again._search_parallel(again._board_to_arr(b, 'X'))[1], visits)
@@ -1,10 +1,21 @@
 import pytest
+import os
 import random
+import numpy as np
 from pathlib import Path
 import sys
 root = Path(__file__).parent.parent
 sys.path.insert(0, str(root))
 from ai.q_learning.q_agent import QAgent
+from ai.q_learning.q_table import QTable, encode_state, decode_state
+from ai.q_learning.dense_q_table import DenseQTable
+from ai.q_learning.mapped_q_table import MappedQTable, save_mapped
+from ai.q_learning.frozen_q_table import FrozenQTable
+from ai.q_learning.policy_table import PolicyTable
+from ai.q_learning.solver import Solver
+from ai.q_learning.training_manager import TrainManager
+from ai.q_learning.vec_env import VecEnv
+from core.batch import BoardBatch
 from core.board import Board
 
 class TestQ:
@@ -154,3 +165,519 @@ class TestQ:
             assert m['r'] == m['action'][0]
             assert m['c'] == m['action'][1]
             assert 0 <= m['conf'] <= 1
+    
+    def test_zobrist_keys(self):
+        # Q-таблица с ключами Зобриста
+        ag = QAgent(size=3, win_len=3, sym='O', zobrist=True)
+        b = Board(size=3, win_len=3)
+        b.move(0, 0, 'X')
+        
+        key, _, _ = ag._to_state(b, 'O')
+        assert isinstance(key, int)
+        assert key == b.zobrist_key('O')
+        
+        a, _ = ag.choose(b, 'O', train=True)
+        b.move(a[0], a[1], 'O')
+        for _ in range(ag.batch):
+            ag.last_s, ag.last_a = key, ag.q.action_to_int(a)
+            ag.reward(1.0, b, 'X', done=True)
+        assert key in ag.q.table
+    
+    def test_symmetric_keys(self):
+        # повернутые позиции - одно состояние
+        ag = QAgent(size=3, win_len=3, sym='O', symmetric=True)
+        keys = set()
+        for r, c in [(0, 0), (0, 2), (2, 0), (2, 2)]:
+            b = Board(size=3, win_len=3)
+            b.move(r, c, 'X')
+            key, _, _ = ag._to_state(b, 'O')
+            keys.add(key)
+            
+            m = ag.get_move(b, 'O')
+            assert b.is_valid(m['r'], m['c'])
+        assert len(keys) == 1
+    
+    @pytest.mark.parametrize("size", [3, 5, 8])
+    def test_int_keys(self, size):
+        # число base-3 + бит символа, обратимо
+        b = Board(size=size, win_len=3)
+        b.move(0, 0, 'X')
+        b.move(size - 1, 1, 'O')
+        key = encode_state(b.grid, 'O')
+        assert key & 1 == 1
+        arr, sym = decode_state(key, size)
+        assert (arr == b.grid).all()
+        assert sym == 'O'
+        assert encode_state(b.grid, 'X') == key - 1
+    
+    def test_legacy_migration(self, tmp_path, monkeypatch):
+        # старая модель со строковыми ключами загружается как числовая
+        import pickle
+        path = tmp_path / "old.pkl"
+        data = {
+            'size': 3, 'win_len': 3,
+            'table': {'100000000_O': {4: 0.5, 8: -0.2}},
+            'visits': {'100000000_O': 3},
+            'lr': 0.1, 'gamma': 0.9, 'init_val': 0.0
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(data, f)
+        
+        q = QTable(3, 3)
+        monkeypatch.setattr(q, '_get_model_path', lambda name: str(path))
+        assert q.load("old")
+        
+        b = Board(size=3, win_len=3)
+        b.move(0, 0, 'X')
+        key = q.get_key(b.grid, 'O')
+        assert q.get_q(key, 4) == 0.5
+        assert q.visits[key] == 3
+        assert q.best_action(key, [1, 4, 8])[0] == 4
+    
+    def test_dense_same_as_dict(self, tmp_path, monkeypatch):
+        # плотная таблица дает те же Q и ходы, формат файла тот же
+        rnd = random.Random(0)
+        q = QTable(3, 3)
+        dq = DenseQTable(3, 3, capacity=2)
+        states = list(range(0, 40, 2))
+        for _ in range(500):
+            s, ns = rnd.choice(states), rnd.choice(states)
+            a = rnd.randrange(9)
+            acts = rnd.sample(range(9), rnd.randrange(4))
+            r = rnd.choice([-1.0, -0.01, 0.1, 1.0])
+            q.update(s, a, r, ns, acts)
+            dq.update(s, a, r, ns, acts)
+        
+        for s in states + [999]:
+            acts = sorted(rnd.sample(range(9), 5))
+            assert dq.best_action(s, acts)[0] == q.best_action(s, acts)[0]
+            for a in range(9):
+                assert dq.get_q(s, a) == pytest.approx(q.get_q(s, a), abs=1e-5)
+        assert dq.stats()['states'] == q.stats()['states']
+        assert dq.stats()['actions'] == q.stats()['actions']
+        assert dq.visits == q.visits
+        
+        # сохранить и загрузить в обычную таблицу
+        path = tmp_path / "dense.pkl"
+        for t in (dq, q):
+            monkeypatch.setattr(t, '_get_model_path', lambda name: str(path))
+        dq.save("dense")
+        q2 = QTable(3, 3)
+        monkeypatch.setattr(q2, '_get_model_path', lambda name: str(path))
+        assert q2.load("dense")
+        assert q2.table.keys() == q.table.keys()
+    
+    def test_dense_dicts(self):
+        # словари visits/table: новые ключи при перевыделении массивов
+        dq = DenseQTable(3, 3, capacity=1)
+        dq.visits = {2: 3, 4: 5, 6: 7}
+        assert dq.visits == {2: 3, 4: 5, 6: 7}
+        
+        # Q без посещений (слияние) остается в словаре и файле
+        dq.set_q(8, 1, 0.5)
+        dq.row(10, create=True)
+        assert dq.table == {8: {1: 0.5}}
+    
+    def test_dense_agent(self):
+        # агент с плотной таблицей
+        ag = QAgent(size=4, win_len=4, sym='X', dense=True)
+        assert isinstance(ag.q, DenseQTable)
+        b = Board(size=4, win_len=4)
+        m = ag.get_move(b, 'X')
+        assert b.is_valid(m['r'], m['c'])
+    
+    def test_batched_replay(self):
+        # батч-обновление совпадает с поэлементным без повторов
+        q = QTable(3, 3)
+        dq = DenseQTable(3, 3)
+        rows = np.array([dq.row(k, create=True) for k in (2, 4, 6, 8)])
+        next_rows = np.array([dq.row(k, create=True) for k in (10, 12, 14, 16)])
+        dq.values[next_rows] = np.arange(36, dtype=np.float32).reshape(4, 9) / 36
+        for k, row in zip((10, 12, 14, 16), next_rows):
+            q.table[k] = {a: float(dq.values[row, a]) for a in range(9)}
+        
+        acts = np.array([0, 1, 2, 3])
+        rews = np.array([1.0, -1.0, 0.1, -0.01], dtype=np.float32)
+        mask = np.zeros((4, 9), dtype=bool)
+        mask[0, [4, 5]] = True
+        mask[2, [8]] = True
+        dq.update_batch(rows, acts, rews, next_rows, mask)
+        for s, a, r, ns, m in zip((2, 4, 6, 8), acts, rews, (10, 12, 14, 16), mask):
+            q.update(s, int(a), float(r), ns, list(np.flatnonzero(m)))
+            assert dq.get_q(s, int(a)) == pytest.approx(q.get_q(s, int(a)), abs=1e-5)
+    
+    def test_dense_agent_learning(self):
+        # агент с кольцевым буфером учится
+        ag = QAgent(size=3, win_len=3, sym='O', eps=0.5, dense=True)
+        for _ in range(40):
+            b = Board(size=3, win_len=3)
+            b.move(1, 1, 'X')
+            a, _ = ag.choose(b, 'O', train=True)
+            b.move(a[0], a[1], 'O')
+            ag.reward(-0.01, b, 'X', done=False)
+        assert len(ag.buffer) == 40
+        assert ag.q.stats()['states'] > 0
+    
+    def test_train_parallel(self, monkeypatch):
+        # параллельная генерация эпизодов
+        tm = TrainManager(size=3, sym='O')
+        saved = []
+        monkeypatch.setattr(tm.agent, 'save', lambda name=None: saved.append(name))
+        eps0 = tm.agent.eps
+        
+        st = tm.train_parallel(eps=60, save_every=40, workers=2, chunk=10)
+        assert st['eps'] == 60
+        assert st['wins'] + st['loss'] + st['draws'] == 60
+        assert tm.agent.q.table
+        assert tm.agent.eps < eps0
+        assert saved == ['q_3x3_win3_O_ep40', 'q_3x3_win3_O_final']
+    
+    def test_q_log_merge(self):
+        # журнал изменений: дельты двух копий складываются в исходной
+        base = QTable(3, 3)
+        base.update(10, 4, 1.0, 12, [])
+        copies = []
+        for rew in (0.5, -0.2):
+            q = QTable(3, 3)
+            q.table = {s: dict(acts) for s, acts in base.table.items()}
+            q.log = {}
+            q.update(10, 4, rew, 12, [])
+            q.update(10, 4, rew, 12, [])
+            q.update(14, 0, 1.0, 12, [])
+            copies.append({sa: (q.get_q(*sa) - old, n) for sa, (old, n) in q.log.items()})
+        assert copies[0][(10, 4)][1] == 2 and copies[0][(14, 0)][0] == pytest.approx(0.1)
+        
+        old = base.get_q(10, 4)
+        for delta in copies:
+            for (s, a), (dv, n) in delta.items():
+                base.set_q(s, a, base.get_q(s, a) + dv, n)
+        assert base.get_q(10, 4) == pytest.approx(old + copies[0][(10, 4)][0] + copies[1][(10, 4)][0])
+        assert base.get_q(14, 0) == pytest.approx(0.2)
+        assert base.visits == {10: 5, 14: 2}
+        assert base.log is None
+    
+    def test_train_progress(self, monkeypatch, capsys):
+        # прогресс через callback вместо печати
+        tm = TrainManager(size=3, sym='X')
+        monkeypatch.setattr(tm.agent, 'save', lambda name=None: None)
+        got = []
+        st = tm.train_vs_random(eps=200, save_every=1000, progress=got.append)
+        assert [p['ep'] for p in got] == [100, 200]
+        assert got[-1]['size'] == 3 and got[-1]['sym'] == 'X'
+        assert got[-1]['wins'] + got[-1]['loss'] + got[-1]['draws'] == 200
+        assert st['eps'] == 200
+        assert "Эпизод" not in capsys.readouterr().out
+    
+    def test_train_all(self, monkeypatch, tmp_path, capsys):
+        # все конфигурации в пуле: итог на каждую (size, sym), модели сохранены
+        from ai.models.q_learning import training_stats
+        monkeypatch.setattr(training_stats, 'cfg', {3: {'eps': 200, 'save': 100, 'wl': 3}})
+        monkeypatch.setattr(QTable, '_get_model_path',
+                            lambda self, name: str(tmp_path / f"{name}.pkl"))
+        res = training_stats.train_all(workers=2, sizes=(3,))
+        
+        got = sorted((r['size'], r['sym']) for r in res['results'])
+        assert got == [(3, 'O'), (3, 'X')]
+        # свой seed у каждой задачи - разные потоки исследования
+        assert len({r['seed'] for r in res['results']}) == 2
+        for r in res['results']:
+            assert r['eps'] == 200 and r['win_len'] == 3
+            assert r['wins'] + r['loss'] + r['draws'] == 200
+        names = sorted(p.stem for p in tmp_path.glob("*.pkl"))
+        assert names == sorted(f"q_3x3_win3_{sym}_{tag}" for sym in ('O', 'X')
+                               for tag in ('ep100', 'ep200', 'final'))
+        out = capsys.readouterr().out
+        assert "[3x3 X] эпизод 200/200" in out and "Всего:" in out
+    
+    def test_train_job_seed(self, monkeypatch, tmp_path):
+        # задача с тем же seed повторяется, с другим - другие партии
+        import queue
+        from ai.models.q_learning import training_stats
+        monkeypatch.setattr(training_stats, 'cfg', {3: {'eps': 100, 'save': 100, 'wl': 3}})
+        monkeypatch.setattr(QTable, '_get_model_path',
+                            lambda self, name: str(tmp_path / f"{name}.pkl"))
+        runs = [training_stats._train_job((3, 'X', seed, queue.Queue()))
+                for seed in (7, 7, 8)]
+        res = [(r['wins'], r['loss'], r['draws']) for r in runs]
+        assert res[0] == res[1] != res[2]
+    
+    @pytest.mark.parametrize("sym", ['X', 'O'])
+    def test_vec_env(self, sym):
+        # награды и итоги векторной среды
+        rews = {'win': 1.0, 'lose': -1.0, 'draw': 0.1, 'step': -0.01}
+        env = VecEnv(32, 3, 3, sym, rews, seed=0)
+        cells = env.reset()
+        me = 1 if sym == 'X' else 2
+        rng = np.random.default_rng(1)
+        for _ in range(30):
+            legal = cells == 0
+            acts = np.where(legal, rng.random(legal.shape), -1).argmax(axis=1)
+            rewards, done, results, nxt = env.step(acts)
+            
+            check = BoardBatch(32, 3, 3)
+            check.cells[:] = nxt
+            win = check.winners()
+            assert ((results == 1) == (win == me)).all()
+            assert ((results == -1) == (win == 3 - me)).all()
+            assert (rewards[results == 1] == 1.0).all()
+            assert (rewards[results == -1] == -1.0).all()
+            assert (rewards[done & (results == 0)] == 0.1).all()
+            assert (rewards[~done] == -0.01).all()
+            
+            # после сброса - новая партия, ход агента
+            stones = (cells[done] != 0).sum(axis=1)
+            assert (stones == (0 if sym == 'X' else 1)).all()
+    
+    def test_train_vectorized(self, monkeypatch):
+        # обучение в векторной среде
+        tm = TrainManager(size=3, sym='X', dense=True)
+        monkeypatch.setattr(tm.agent, 'save', lambda name=None: None)
+        st = tm.train_vectorized(eps=50, save_every=1000, n_envs=8, seed=0)
+        assert st['eps'] >= 50
+        assert st['wins'] + st['loss'] + st['draws'] == st['eps']
+        assert tm.agent.q.stats()['states'] > 0
+    
+    def test_train_vectorized_saves(self, monkeypatch):
+        # за шаг заканчиваются десятки партий: каждая точка сохранения
+        # записывается ровно один раз, итог - ровно eps партий
+        tm = TrainManager(size=3, sym='X', dense=True)
+        saved = []
+        monkeypatch.setattr(tm.agent, 'save', lambda name=None: saved.append(name))
+        st = tm.train_vectorized(eps=100, save_every=10, n_envs=64, seed=0)
+        assert st['eps'] == 100
+        assert st['wins'] + st['loss'] + st['draws'] == 100
+        assert saved == [f"q_3x3_win3_X_ep{n}" for n in range(10, 101, 10)] + ["q_3x3_win3_X_final"]
+    
+    @pytest.mark.parametrize("size", [3, 8])
+    def test_mapped_table(self, tmp_path, size):
+        # бинарный формат: те же Q, ходы и посещения, что у словаря
+        q = QTable(size, 3 if size == 3 else 5, init_val=0.25)
+        rng = np.random.default_rng(0)
+        keys = []
+        for _ in range(200):
+            grid = rng.integers(0, 3, size * size).reshape(size, size)
+            key = q.get_key(grid, 'O' if rng.random() < 0.5 else 'X')
+            keys.append(key)
+            for a in rng.choice(size * size, 3, replace=False):
+                q.update(key, int(a), float(rng.normal()), key, [])
+        
+        path = save_mapped(q, str(tmp_path / "m.qtb"))
+        m = MappedQTable(path)
+        assert (m.size, m.init_val) == (size, 0.25)
+        assert m.table == {k: {a: pytest.approx(v) for a, v in acts.items()}
+                           for k, acts in q.table.items()}
+        assert m.visits == q.visits
+        acts = list(range(size * size))
+        for key in keys + [keys[0] ^ 2, 1]:
+            assert m.best_action(key, acts)[0] == q.best_action(key, acts)[0]
+            assert m.get_q(key, 0) == pytest.approx(q.get_q(key, 0))
+        with pytest.raises(RuntimeError):
+            m.update(keys[0], 0, 1.0, keys[0], [])
+    
+    def test_agent_prefers_mapped(self, tmp_path):
+        # .qtb только по mapped=True и только если не старше .pkl
+        model_path = lambda name: str(tmp_path / f"{name}.pkl")
+        
+        def make_agent(act: int) -> QAgent:
+            agent = QAgent(3, 3, 'X')
+            agent.q._get_model_path = model_path
+            agent.q.update(agent.q.get_key(np.zeros((3, 3)), 'X'), act, 1.0, 0, [])
+            return agent
+        
+        agent = make_agent(4)
+        agent.q.save("m")
+        agent.save_mapped("m")
+        
+        # по умолчанию - pickle, обучение продолжается
+        trained = make_agent(0)
+        assert trained.load("m") and type(trained.q) is QTable
+        trained.choose(Board(3, 3), 'X', train=True)
+        trained.reward(0.5, Board(3, 3), 'O')
+        
+        served = make_agent(0)
+        assert served.load("m", mapped=True) and isinstance(served.q, MappedQTable)
+        info = served.get_move(Board(3, 3), 'X')
+        assert (info['r'], info['c']) == (1, 1)
+        
+        # переобученный .pkl новее .qtb - устаревший .qtb не читается
+        make_agent(0).q.save("m")
+        qtb = str(tmp_path / "m.qtb")
+        stamp = os.path.getmtime(qtb)
+        os.utime(model_path("m"), (stamp + 10, stamp + 10))
+        served = make_agent(4)
+        assert served.load("m", mapped=True) and type(served.q) is QTable
+        info = served.get_move(Board(3, 3), 'X')
+        assert (info['r'], info['c']) == (0, 0)
+    
+    @pytest.mark.parametrize("symmetric", [False, True])
+    def test_frozen_table(self, tmp_path, symmetric):
+        # замороженная таблица: те же ходы, что у обученной
+        agent = QAgent(3, 3, 'X', eps=0.5, symmetric=symmetric)
+        model_path = lambda name: str(tmp_path / f"{name}.pkl")
+        agent.q._get_model_path = model_path
+        rng = random.Random(0)
+        boards = []
+        for _ in range(100):
+            b = Board(3, 3)
+            sym = 'X'
+            while not b.get_winner() and not b.is_full():
+                boards.append((b.grid.copy(), sym))
+                (r, c), _ = agent.choose(b, sym, train=True)
+                b.move(r, c, sym)
+                sym = 'O' if sym == 'X' else 'X'
+                agent.reward(rng.random() - 0.5, b, sym,
+                             done=b.get_winner() is not None or b.is_full())
+        
+        frozen = FrozenQTable.freeze(agent.q)
+        assert frozen.stats()['states'] == len(agent.q.table)
+        for grid, sym in boards:
+            key, arr, _ = agent.q.grid_key(grid, sym)
+            acts = np.flatnonzero(arr.ravel() == 0).tolist()
+            assert frozen.best_action(key, acts)[0] == agent.q.best_action(key, acts)[0]
+        assert frozen.row(10 ** 6) == -1
+        
+        agent.q.save("f")
+        agent.freeze("f")
+        served = QAgent(3, 3, 'X')
+        served.q._get_model_path = model_path
+        assert served.load("f", mapped=True) and isinstance(served.q, FrozenQTable)
+        grid, sym = boards[5]
+        b = Board(3, 3)
+        for idx in np.flatnonzero(grid):
+            b.move(idx // 3, idx % 3, 'X' if grid.flat[idx] == 1 else 'O')
+        agent.eps = served.eps = 0.0
+        assert served.choose(b, sym)[0] == agent.choose(b, sym)[0]
+        
+        # переобученный .pkl новее .qfz - читается pickle
+        agent.q.save("f")
+        stamp = os.path.getmtime(str(tmp_path / "f.qfz"))
+        os.utime(model_path("f"), (stamp + 10, stamp + 10))
+        served = QAgent(3, 3, 'X')
+        served.q._get_model_path = model_path
+        assert served.load("f", mapped=True) and type(served.q) is QTable
+    
+    def test_frozen_rejects_zobrist(self):
+        # по хешу нельзя перечислить допустимые ходы - заморозка запрещена
+        q = QTable(3, 3, zobrist=True)
+        q.update(12345, 4, 1.0, 0, [])
+        with pytest.raises(ValueError):
+            FrozenQTable.freeze(q)
+    
+    @pytest.mark.parametrize("symmetric", [False, True])
+    def test_policy_table(self, tmp_path, symmetric):
+        # массив политики 3x3: те же ходы, что у обученной таблицы
+        agent = QAgent(3, 3, 'O', eps=0.5, symmetric=symmetric)
+        model_path = lambda name: str(tmp_path / f"{name}.pkl")
+        agent.q._get_model_path = model_path
+        rng = random.Random(1)
+        boards = []
+        for _ in range(100):
+            b = Board(3, 3)
+            sym = 'X'
+            while not b.get_winner() and not b.is_full():
+                if sym == 'O':
+                    boards.append(b.grid.copy())
+                    (r, c), _ = agent.choose(b, sym, train=True)
+                    b.move(r, c, sym)
+                    agent.reward(rng.random() - 0.5, b, 'X',
+                                 done=b.get_winner() is not None or b.is_full())
+                else:
+                    r, c = rng.choice([(r, c) for r in range(3) for c in range(3)
+                                       if b.grid[r, c] == 0])
+                    b.move(r, c, sym)
+                sym = 'O' if sym == 'X' else 'X'
+        
+        policy = PolicyTable.from_qtable(agent.q)
+        assert len(policy.data) == 3 ** 9 and not policy.symmetric
+        known = 0
+        for grid in boards:
+            key, arr, t = agent.q.grid_key(grid, 'O')
+            if key not in agent.q.table:
+                continue
+            known += 1
+            acts = np.flatnonzero(arr.ravel() == 0).tolist()
+            best = agent.q.sym_table.from_canonical(t, agent.q.best_action(key, acts)[0])
+            pkey = policy.get_key(grid, 'O')
+            act = policy.move(pkey)
+            assert grid.flat[act] == 0
+            if not symmetric:
+                assert act == best
+                continue
+            # ход может отличаться на симметрию самой канонической доски
+            mine, ref = arr.ravel().copy(), arr.ravel().copy()
+            mine[agent.q.sym_table.to_canonical(t, act)] = 2
+            ref[agent.q.best_action(key, acts)[0]] = 2
+            canon = agent.q.sym_table.canonical
+            assert (canon(mine)[0] == canon(ref)[0]).all()
+        assert known > len(boards) // 2
+        # ход за другой символ в той же позиции неизвестен
+        assert policy.move(policy.get_key(boards[0], 'X')) == -1
+        
+        agent.save_policy("p")
+        served = QAgent(3, 3, 'O')
+        served.q._get_model_path = model_path
+        assert served.load("p", mapped=True) and isinstance(served.q, PolicyTable)
+        assert (served.q.moves == policy.moves).all()
+        
+        # переобученный .pkl новее .qpa - читается pickle
+        agent.q.save("p")
+        stamp = os.path.getmtime(str(tmp_path / "p.qpa"))
+        os.utime(model_path("p"), (stamp + 10, stamp + 10))
+        served = QAgent(3, 3, 'O')
+        served.q._get_model_path = model_path
+        assert served.load("p", mapped=True) and not isinstance(served.q, PolicyTable)
+    
+    def test_policy_table_size(self):
+        # прямая адресация только 3x3
+        for size in (4, 5):
+            with pytest.raises(ValueError):
+                PolicyTable.empty(size, 4)
+            with pytest.raises(ValueError):
+                PolicyTable.from_qtable(QTable(size, 4))
+        assert PolicyTable.from_qtable(QTable(3, 3)).stats()['states'] == 0
+    
+    @pytest.mark.parametrize("sym", ['X', 'O'])
+    def test_solver_3x3(self, tmp_path, sym):
+        # решенная таблица 3x3: ничья из начала, агент не проигрывает
+        solver = Solver(3, 3)
+        assert solver.solve() == 0
+        q = solver.to_qtable(sym)
+        q._get_model_path = lambda name: str(tmp_path / f"{name}.pkl")
+        q.save("solved")
+        agent = QAgent(3, 3, sym, eps=0.0)
+        agent.q._get_model_path = q._get_model_path
+        assert agent.load("solved") and agent.q.symmetric
+        
+        rng = random.Random(2)
+        for _ in range(100):
+            b = Board(3, 3)
+            cur = 'X'
+            while not b.get_winner() and not b.is_full():
+                if cur == sym:
+                    (r, c), _ = agent.choose(b, cur)
+                else:
+                    r, c = rng.choice([(r, c) for r in range(3) for c in range(3)
+                                       if b.grid[r, c] == 0])
+                b.move(r, c, cur)
+                cur = 'O' if cur == 'X' else 'X'
+            assert b.get_winner() in (None, sym)
+    
+    def test_solver_takes_win(self):
+        # из двух выигрышей выбирает, а не блокирует
+        b = Board(3, 3)
+        for r, c, s in [(0, 0, 'X'), (1, 0, 'O'), (0, 1, 'X'), (1, 1, 'O')]:
+            b.move(r, c, s)
+        agent = QAgent(3, 3, 'X', eps=0.0)
+        agent.q = Solver(3, 3).to_qtable('X')
+        assert agent.choose(b, 'X')[0] == (0, 2)
+    
+    def test_agent_candidates(self):
+        # radius: действия агента только рядом с камнями
+        agent = QAgent(9, 5, 'O', eps=1.0, radius=1)
+        b = Board(9, 5)
+        assert agent._possible_acts(b.grid) == [40]
+        b.move(0, 0, 'X')
+        assert agent._possible_acts(b.grid) == [1, 9, 10]
+        for _ in range(20):
+            (r, c), _ = agent.choose(b, 'O')
+            assert (r, c) in [(0, 1), (1, 0), (1, 1)]